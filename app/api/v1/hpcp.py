@@ -1,26 +1,54 @@
 """HPCP特徴量抽出・検索APIエンドポイント."""
 
+import asyncio
 import shutil
 import tempfile
 import time
+import zlib
 from datetime import datetime
 from pathlib import Path
 from typing import Annotated
 
-import essentia.standard as es  # type: ignore
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+import numpy as np
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Response,
+    UploadFile,
+)
 from sqlalchemy.orm import Session
 
-from app.core.audio.hpcp import extract_hpcp, normalize_hpcp
-from app.core.matching.similarity import calculate_similarity_advanced
-from app.core.vector.sqlite_vec_manager import SQLiteVecManager
+from app.core.audio.hpcp import extract_hpcp_from_audio, load_audio, normalize_hpcp
+from app.core.matching.cache import reference_feature_cache
+from app.core.matching.similarity import (
+    HPCPFeatures,
+    calculate_similarity_batch,
+    compute_similarity_features,
+)
+from app.core.vector.sqlite_vec_manager import get_vec_manager
+from app.db.crud import (
+    get_hpcp_array,
+    get_hpcp_arrays,
+    get_recording,
+    get_recordings_by_ids,
+    get_similarity_features,
+)
 from app.db.database import get_db
 from app.schemas.hpcp import (
+    HPCP_BINARY_COMPRESSION_LEVEL,
     HPCPExtractionOnlyResponse,
     HPCPSearchRequest,
+    QueryRecording,
+    RecordingHPCPResponse,
     RecordingInfo,
     SimilaritySearchResponse,
+    SimilarRecording,
     SongInfo,
+    VectorStats,
+    encode_hpcp_array,
 )
 
 router = APIRouter(prefix="/hpcp", tags=["HPCP"])
@@ -28,24 +56,47 @@ router = APIRouter(prefix="/hpcp", tags=["HPCP"])
 # サポートされる音声ファイル形式
 SUPPORTED_AUDIO_FORMATS = {".wav", ".mp3", ".m4a", ".flac", ".ogg"}
 
+# アップロードファイルを一時ファイルへコピーする際のバッファサイズ（1MB）
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
 
-@router.post("/extract-only", response_model=HPCPExtractionOnlyResponse)
-async def extract_hpcp_only(
-    file: Annotated[UploadFile, File(description="音声ファイル")],
-) -> HPCPExtractionOnlyResponse:
-    """音声ファイルからHPCP特徴量を抽出する（DB格納なし）.
+
+def _save_upload_to_temp_file(file: UploadFile, suffix: str) -> Path:
+    """アップロードファイルを一時ファイルに保存する.
+
+    Args:
+        file: アップロードされたファイル
+        suffix: 一時ファイルの拡張子
+
+    Returns:
+        保存した一時ファイルのパス
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        temp_audio_path = Path(temp_file.name)
+        try:
+            shutil.copyfileobj(file.file, temp_file, length=UPLOAD_COPY_BUFFER_SIZE)
+        except Exception:
+            # 書き込みに失敗した一時ファイルは残さない
+            temp_file.close()
+            temp_audio_path.unlink(missing_ok=True)
+            raise
+    return temp_audio_path
+
+
+async def extract_hpcp_from_upload(
+    file: UploadFile, sample_rate: int = 44100
+) -> tuple[np.ndarray, float]:
+    """アップロードされた音声ファイルからHPCP特徴量を抽出する.
 
     Args:
         file: アップロードされた音声ファイル
+        sample_rate: 読み込み時のサンプルレート（デフォルト: 44100Hz）
 
     Returns:
-        HPCP特徴量と音声情報
+        (正規化済みのHPCP特徴量, 音源の長さ（秒）)のタプル
 
     Raises:
         HTTPException: 各種エラー（ファイル形式、処理エラー等）
     """
-    start_time = time.time()
-
     # ファイル形式チェック
     if not file.filename:
         raise HTTPException(status_code=400, detail="ファイル名が指定されていません")
@@ -62,16 +113,18 @@ async def extract_hpcp_only(
 
     try:
         # 一時ファイルに保存
-        with tempfile.NamedTemporaryFile(suffix=file_suffix, delete=False) as temp_file:
-            temp_audio_path = Path(temp_file.name)
-            shutil.copyfileobj(file.file, temp_file)
+        # ブロッキングI/Oやデコード処理はスレッドプールで実行し、
+        # イベントループを止めないようにする
+        temp_audio_path = await asyncio.to_thread(
+            _save_upload_to_temp_file, file, file_suffix
+        )
 
         # 音声ファイルの基本情報を取得
         try:
-            loader = es.MonoLoader(filename=str(temp_audio_path), sampleRate=44100)
-            audio_data = loader()
-            duration = len(audio_data) / 44100.0
-            sample_rate = 44100
+            audio_data = await asyncio.to_thread(
+                load_audio, temp_audio_path, sample_rate=sample_rate
+            )
+            duration = len(audio_data) / float(sample_rate)
         except Exception as e:
             raise HTTPException(
                 status_code=400,
@@ -80,23 +133,17 @@ async def extract_hpcp_only(
 
         # HPCP特徴量を抽出
         try:
-            hpcp_array = extract_hpcp(temp_audio_path, sample_rate=sample_rate)
+            # 読み込み済みの音声信号を使い、デコードを1回で済ませる
+            hpcp_array = await asyncio.to_thread(
+                extract_hpcp_from_audio, audio_data, sample_rate=sample_rate
+            )
             hpcp_array = normalize_hpcp(hpcp_array)
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"HPCP特徴量の抽出に失敗しました: {str(e)}"
             ) from e
 
-        # 処理時間計算
-        processing_time = time.time() - start_time
-
-        # レスポンス作成
-        return HPCPExtractionOnlyResponse.from_hpcp_array(
-            hpcp_array=hpcp_array,
-            duration=duration,
-            sample_rate=sample_rate,
-            processing_time=processing_time,
-        )
+        return hpcp_array, duration
 
     except HTTPException:
         raise
@@ -113,55 +160,171 @@ async def extract_hpcp_only(
                 pass
 
 
-@router.post("/search", response_model=SimilaritySearchResponse)
-async def search_similar_recordings(
-    request: HPCPSearchRequest,
-    db: Session = Depends(get_db),
-    threshold: float = 0.89,
-    pre_filter_limit: int = 50,
-) -> SimilaritySearchResponse:
-    """高度な類似度計算を使用した類似楽曲検索.
+def _hpcp_binary_response(
+    hpcp_array: np.ndarray, headers: dict[str, str] | None = None
+) -> Response:
+    """HPCP特徴量をdeflate圧縮したfloat32のバイナリレスポンスを作成する.
 
-    sqlite-vecで高速に候補を絞り込んだ後、高度な類似度計算で精密に判定します。
+    JSON + Base64 による膨張とエンコード処理を避けるため、リトルエンディアンの
+    float32配列をdeflate圧縮してそのまま返す。配列の形状は X-HPCP-Shape
+    ヘッダーで返す。Content-Encoding を付与しているため、一般的なHTTP
+    クライアントでは展開済みのバイト列として受け取れる。
 
     Args:
-        request: 検索リクエスト（HPCP特徴量、検索方法、取得件数）
-        db: データベースセッション
-        threshold: 高度な類似度計算の閾値（デフォルト: 0.89）
-        pre_filter_limit: 事前フィルタリングで取得する候補数（デフォルト: 50）
+        hpcp_array: HPCP特徴量のnumpy配列（フレーム数 x 12）
+        headers: 追加するレスポンスヘッダー
 
     Returns:
-        類似楽曲検索結果（高度な類似度スコア付き）
+        HPCP特徴量のバイナリレスポンス
+    """
+    hpcp_bytes = np.ascontiguousarray(hpcp_array, dtype="<f4").tobytes()
+
+    return Response(
+        content=zlib.compress(hpcp_bytes, HPCP_BINARY_COMPRESSION_LEVEL),
+        media_type="application/octet-stream",
+        headers={
+            "Content-Encoding": "deflate",
+            "X-HPCP-Shape": ",".join(str(dim) for dim in hpcp_array.shape),
+            "X-HPCP-Dtype": "<f4",
+            **(headers or {}),
+        },
+    )
+
+
+@router.post("/extract-only", response_model=HPCPExtractionOnlyResponse)
+async def extract_hpcp_only(
+    file: Annotated[UploadFile, File(description="音声ファイル")],
+) -> HPCPExtractionOnlyResponse:
+    """音声ファイルからHPCP特徴量を抽出する（DB格納なし）.
+
+    Args:
+        file: アップロードされた音声ファイル
+
+    Returns:
+        HPCP特徴量と音声情報
 
     Raises:
-        HTTPException: 各種エラー
+        HTTPException: 各種エラー（ファイル形式、処理エラー等）
     """
     start_time = time.time()
 
-    vec_manager = None
+    sample_rate = 44100
+    hpcp_array, duration = await extract_hpcp_from_upload(file, sample_rate=sample_rate)
 
-    try:
-        # HPCP特徴量を復元
+    # 処理時間計算
+    processing_time = time.time() - start_time
+
+    # レスポンス作成
+    return HPCPExtractionOnlyResponse.from_hpcp_array(
+        hpcp_array=hpcp_array,
+        duration=duration,
+        sample_rate=sample_rate,
+        processing_time=processing_time,
+    )
+
+
+@router.post("/extract-only/binary")
+async def extract_hpcp_only_binary(
+    file: Annotated[UploadFile, File(description="音声ファイル")],
+) -> Response:
+    """音声ファイルからHPCP特徴量を抽出し、バイナリ形式で返す（DB格納なし）.
+
+    /extract-only と同じ処理を行い、HPCP特徴量をJSONではなく
+    /recordings/{recording_id}/hpcp/binary と同じ形式で返す。
+    音源の長さは X-Audio-Duration ヘッダーで返す。
+
+    Args:
+        file: アップロードされた音声ファイル
+
+    Returns:
+        HPCP特徴量のバイナリデータ
+
+    Raises:
+        HTTPException: 各種エラー（ファイル形式、処理エラー等）
+    """
+    hpcp_array, duration = await extract_hpcp_from_upload(file)
+
+    return _hpcp_binary_response(
+        hpcp_array, headers={"X-Audio-Duration": str(duration)}
+    )
+
+
+def _compute_reference_features(
+    hpcp_arrays: dict[int, np.ndarray],
+) -> dict[int, HPCPFeatures]:
+    """参照側の録音データのHPCP特徴量から類似度計算用の派生特徴量を計算する.
+
+    CPU負荷が高いため、スレッドプールからまとめて呼び出す。
+
+    Args:
+        hpcp_arrays: 録音データIDをキーとするHPCP特徴量の辞書
+
+    Returns:
+        録音データIDをキーとする派生特徴量の辞書（計算に失敗したものは含まない）
+    """
+    features = {}
+    for recording_id, hpcp_array in hpcp_arrays.items():
         try:
-            query_hpcp = request.to_hpcp_array()
-        except Exception as e:
-            raise HTTPException(
-                status_code=400, detail=f"HPCP特徴量の復元に失敗しました: {str(e)}"
-            ) from e
+            features[recording_id] = compute_similarity_features(hpcp_array)
+        except Exception:
+            # エラーが発生した場合はスキップ
+            continue
+    return features
+
+
+async def _search_similar_recordings(
+    query_hpcp: np.ndarray,
+    search_method: str,
+    limit: int,
+    db: Session,
+    threshold: float,
+    pre_filter_limit: int,
+    max_distance: float | None,
+    start_time: float,
+) -> SimilaritySearchResponse:
+    """HPCP特徴量で類似楽曲を検索する.
+
+    sqlite-vecで候補を絞り込んだ後、高度な類似度計算で精密に判定する。
+
+    Args:
+        query_hpcp: クエリ音声のHPCP特徴量
+        search_method: 検索方法（frames, mean, dominant, std）
+        limit: 取得する類似楽曲数
+        db: データベースセッション
+        threshold: 高度な類似度計算の閾値
+        pre_filter_limit: 事前フィルタリングで取得する候補数
+        max_distance: 事前フィルタリングで許容するベクトル距離の上限
+        start_time: 処理時間の計測開始時刻
 
+    Returns:
+        類似楽曲検索結果（高度な類似度スコア付き）
+
+    Raises:
+        HTTPException: 各種エラー
+    """
+    try:
         # sqlite-vecで候補を高速検索（多めに取得）
+        # ベクトル検索と以降の類似度計算はCPU負荷が高いため、スレッドプールで
+        # 実行してイベントループを止めないようにする
         try:
-            vec_manager = SQLiteVecManager()
+            vec_manager = get_vec_manager()
 
             # フレーム単位検索を推奨（最も精度が高い）
-            if request.search_method == "frames":
-                search_results = vec_manager.search_similar_recordings_by_frames(
-                    query_hpcp, k=pre_filter_limit
+            if search_method == "frames":
+                search_results = await asyncio.to_thread(
+                    vec_manager.search_similar_recordings_by_frames,
+                    query_hpcp,
+                    k=pre_filter_limit,
+                    max_distance=max_distance,
                 )
             else:
                 # そのまま渡す（SQLiteVecManager側でaverage/medianを処理）
-                search_results = vec_manager.search_similar_recordings_by_summary(
-                    query_hpcp, k=pre_filter_limit, method=request.search_method
+                search_results = await asyncio.to_thread(
+                    vec_manager.search_similar_recordings_by_summary,
+                    query_hpcp,
+                    k=pre_filter_limit,
+                    method=search_method,
+                    max_distance=max_distance,
                 )
 
         except Exception as e:
@@ -169,35 +332,74 @@ async def search_similar_recordings(
                 status_code=500, detail=f"類似楽曲検索に失敗しました: {str(e)}"
             ) from e
 
-        # 高度な類似度計算で再評価とフィルタリング
-        filtered_results = []
-        for recording_id, distance in search_results:
-            from app.db.crud import get_hpcp_array, get_recording
+        # クエリ側の派生特徴量は候補によらないため一度だけ計算する
+        query_features = await asyncio.to_thread(
+            compute_similarity_features, query_hpcp
+        )
 
-            recording = get_recording(db, recording_id)
+        # 楽曲情報を持つ候補の録音データを1回のクエリでまとめて取得
+        recordings = get_recordings_by_ids(
+            db, [recording_id for recording_id, _ in search_results]
+        )
+        candidates = []
+        for recording_id, distance in search_results:
+            recording = recordings.get(recording_id)
             if recording and recording.song:
-                try:
-                    ref_hpcp = get_hpcp_array(db, recording_id)
-                    if ref_hpcp is not None:
-                        # 高度な類似度計算
-                        advanced_score = calculate_similarity_advanced(
-                            query_hpcp, ref_hpcp
-                        )
-
-                        # 閾値以上のもののみを追加
-                        if advanced_score >= threshold:
-                            filtered_results.append(
-                                (recording, advanced_score, distance)
-                            )
-                except Exception:
-                    # エラーが発生した場合はスキップ
-                    continue
+                candidates.append((recording, distance))
+
+        # 参照側の派生特徴量はキャッシュを優先し、不足分のみまとめてDBから取得
+        ref_features = {}
+        missing_ids = []
+        for recording, _ in candidates:
+            cached_features = reference_feature_cache.get(recording.id)
+            if cached_features is None:
+                missing_ids.append(recording.id)
+            else:
+                ref_features[recording.id] = cached_features
+
+        # 登録時に保存した派生特徴量を読み出す
+        stored_features = get_similarity_features(db, missing_ids)
+        for recording_id, features in stored_features.items():
+            reference_feature_cache.put(recording_id, features)
+            ref_features[recording_id] = features
+
+        # 派生特徴量が保存されていない録音データはHPCP特徴量から計算する
+        missing_ids = [
+            recording_id
+            for recording_id in missing_ids
+            if recording_id not in stored_features
+        ]
+        computed_features = await asyncio.to_thread(
+            _compute_reference_features, get_hpcp_arrays(db, missing_ids)
+        )
+        for recording_id, features in computed_features.items():
+            reference_feature_cache.put(recording_id, features)
+            ref_features[recording_id] = features
+
+        # 高度な類似度計算で全候補をまとめて再評価し、閾値以上のもののみを残す
+        scored_candidates = [
+            (recording, distance)
+            for recording, distance in candidates
+            if recording.id in ref_features
+        ]
+        advanced_scores = await asyncio.to_thread(
+            calculate_similarity_batch,
+            query_features,
+            [ref_features[recording.id] for recording, _ in scored_candidates],
+        )
+        filtered_results = [
+            (recording, float(advanced_score), distance)
+            for (recording, distance), advanced_score in zip(
+                scored_candidates, advanced_scores, strict=True
+            )
+            if advanced_score >= threshold
+        ]
 
         # 高度な類似度スコアで降順ソート
         filtered_results.sort(key=lambda x: x[1], reverse=True)
 
         # 結果を指定件数に制限
-        filtered_results = filtered_results[: request.limit]
+        filtered_results = filtered_results[:limit]
 
         # レスポンス形式に変換
         similar_recordings = []
@@ -221,8 +423,6 @@ async def search_similar_recordings(
                 song=song_info,
             )
 
-            from app.schemas.hpcp import SimilarRecording
-
             similar_recordings.append(
                 SimilarRecording(
                     recording=recording_info,
@@ -235,8 +435,6 @@ async def search_similar_recordings(
         search_time = time.time() - start_time
 
         # ダミーのクエリ録音情報（実際のクエリは録音データとして保存されていない）
-        from app.schemas.hpcp import QueryRecording
-
         dummy_song_info = SongInfo(
             id=0,
             title="クエリ楽曲",
@@ -261,7 +459,7 @@ async def search_similar_recordings(
         return SimilaritySearchResponse(
             query_recording=query_recording,
             similar_recordings=similar_recordings,
-            search_method=request.search_method,
+            search_method=search_method,
             search_time=search_time,
         )
 
@@ -271,16 +469,149 @@ async def search_similar_recordings(
         raise HTTPException(
             status_code=500, detail=f"処理中に内部エラーが発生しました: {str(e)}"
         ) from e
-    finally:
-        if vec_manager:
-            vec_manager.close()
 
 
-@router.get("/recordings/{recording_id}/hpcp")
+@router.post("/search", response_model=SimilaritySearchResponse)
+async def search_similar_recordings(
+    request: HPCPSearchRequest,
+    db: Session = Depends(get_db),
+    threshold: float = 0.89,
+    pre_filter_limit: int = 50,
+    max_distance: float | None = None,
+) -> SimilaritySearchResponse:
+    """高度な類似度計算を使用した類似楽曲検索.
+
+    sqlite-vecで高速に候補を絞り込んだ後、高度な類似度計算で精密に判定します。
+
+    Args:
+        request: 検索リクエスト（HPCP特徴量、検索方法、取得件数）
+        db: データベースセッション
+        threshold: 高度な類似度計算の閾値（デフォルト: 0.89）
+        pre_filter_limit: 事前フィルタリングで取得する候補数（デフォルト: 50）
+        max_distance: 事前フィルタリングで許容するベクトル距離の上限
+            （デフォルト: None、制限なし）。ベクトル距離は転調を考慮しないため、
+            指定すると転調した音源を取りこぼす場合がある
+
+    Returns:
+        類似楽曲検索結果（高度な類似度スコア付き）
+
+    Raises:
+        HTTPException: 各種エラー
+    """
+    start_time = time.time()
+
+    # HPCP特徴量を復元
+    try:
+        query_hpcp = request.to_hpcp_array()
+    except Exception as e:
+        raise HTTPException(
+            status_code=400, detail=f"HPCP特徴量の復元に失敗しました: {str(e)}"
+        ) from e
+
+    return await _search_similar_recordings(
+        query_hpcp,
+        search_method=request.search_method,
+        limit=request.limit,
+        db=db,
+        threshold=threshold,
+        pre_filter_limit=pre_filter_limit,
+        max_distance=max_distance,
+        start_time=start_time,
+    )
+
+
+@router.post("/search/audio", response_model=SimilaritySearchResponse)
+async def search_similar_recordings_by_audio(
+    file: Annotated[UploadFile, File(description="検索用音声ファイル")],
+    search_method: Annotated[
+        str, Form(description="検索方法", pattern="^(frames|mean|dominant|std)$")
+    ] = "frames",
+    limit: Annotated[int, Form(description="取得する類似楽曲数", ge=1, le=50)] = 5,
+    db: Session = Depends(get_db),
+    threshold: float = 0.89,
+    pre_filter_limit: int = 50,
+    max_distance: float | None = None,
+    include_hpcp: bool = False,
+) -> SimilaritySearchResponse:
+    """音声ファイルからHPCP特徴量を抽出し、そのまま類似楽曲を検索する.
+
+    /extract-only と /search を1回のリクエストで行う。音声ファイルの
+    アップロードが1回で済む。include_hpcp を指定した場合は抽出した
+    HPCP特徴量を query_hpcp_data として返すため、同じ音声で条件を変えて
+    再検索する場合は /search を使える。
+
+    Args:
+        file: 検索用の音声ファイル
+        search_method: 検索方法（デフォルト: frames）
+        limit: 取得する類似楽曲数（デフォルト: 5）
+        db: データベースセッション
+        threshold: 高度な類似度計算の閾値（デフォルト: 0.89）
+        pre_filter_limit: 事前フィルタリングで取得する候補数（デフォルト: 50）
+        max_distance: 事前フィルタリングで許容するベクトル距離の上限
+            （デフォルト: None、制限なし）
+        include_hpcp: 抽出したHPCP特徴量をレスポンスに含めるか
+            （デフォルト: False）
+
+    Returns:
+        類似楽曲検索結果（高度な類似度スコア付き）
+
+    Raises:
+        HTTPException: 各種エラー（ファイル形式、処理エラー等）
+    """
+    start_time = time.time()
+
+    query_hpcp, _ = await extract_hpcp_from_upload(file)
+
+    response = await _search_similar_recordings(
+        query_hpcp,
+        search_method=search_method,
+        limit=limit,
+        db=db,
+        threshold=threshold,
+        pre_filter_limit=pre_filter_limit,
+        max_distance=max_distance,
+        start_time=start_time,
+    )
+    # 同じ音声で再検索する際に /search で再利用できるよう、要求されたら抽出結果も返す
+    if include_hpcp:
+        response.query_hpcp_data = encode_hpcp_array(query_hpcp)
+    return response
+
+
+def _get_stored_hpcp_array(db: Session, recording_id: int) -> np.ndarray:
+    """DBに保存されている録音データのHPCP特徴量を取得する.
+
+    Args:
+        db: データベースセッション
+        recording_id: 録音データID
+
+    Returns:
+        HPCP特徴量のnumpy配列
+
+    Raises:
+        HTTPException: HPCP特徴量が見つからない、または読み出せない場合
+    """
+    try:
+        hpcp_array = get_hpcp_array(db, recording_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"保存されているHPCP特徴量を読み出せません"
+            f"（データが破損しているか旧形式です）: {str(e)}",
+        ) from e
+
+    if hpcp_array is None:
+        raise HTTPException(
+            status_code=404, detail="録音データのHPCP特徴量が見つかりません"
+        )
+    return hpcp_array
+
+
+@router.get("/recordings/{recording_id}/hpcp", response_model=RecordingHPCPResponse)
 async def get_recording_hpcp(
     recording_id: int,
     db: Session = Depends(get_db),
-) -> dict:
+) -> RecordingHPCPResponse:
     """特定の録音データのHPCP特徴量を取得する.
 
     Args:
@@ -291,53 +622,59 @@ async def get_recording_hpcp(
         HPCP特徴量データ
 
     Raises:
-        HTTPException: 録音データが見つからない場合
+        HTTPException: 録音データが見つからない、またはHPCP特徴量を読み出せない場合
     """
-    from app.db.crud import get_hpcp_array, get_recording
-
     # 録音データの存在確認
     recording = get_recording(db, recording_id)
     if not recording:
         raise HTTPException(status_code=404, detail="録音データが見つかりません")
 
     # HPCP特徴量を取得
-    hpcp_array = get_hpcp_array(db, recording_id)
-    if hpcp_array is None:
-        raise HTTPException(
-            status_code=404, detail="録音データのHPCP特徴量が見つかりません"
-        )
+    hpcp_array = _get_stored_hpcp_array(db, recording_id)
 
     # Base64エンコードして返す
-    from app.schemas.hpcp import HPCPExtractionOnlyResponse
-
-    return {
-        "recording_id": recording_id,
-        "hpcp_data": HPCPExtractionOnlyResponse.from_hpcp_array(
-            hpcp_array=hpcp_array,
-            duration=recording.duration,
-            sample_rate=recording.sample_rate,
-            processing_time=0.0,
-        ).hpcp_data,
-        "shape": list(hpcp_array.shape),
-    }
-
-
-@router.get("/stats")
-async def get_vector_stats():
+    return RecordingHPCPResponse(
+        recording_id=recording_id,
+        hpcp_data=encode_hpcp_array(hpcp_array),
+        shape=list(hpcp_array.shape),
+    )
+
+
+@router.get("/recordings/{recording_id}/hpcp/binary")
+async def get_recording_hpcp_binary(
+    recording_id: int,
+    db: Session = Depends(get_db),
+) -> Response:
+    """特定の録音データのHPCP特徴量をバイナリ形式で取得する.
+
+    リトルエンディアンのfloat32配列をdeflate圧縮して返す。
+    配列の形状は X-HPCP-Shape ヘッダーで返す。
+
+    Args:
+        recording_id: 録音データID
+        db: データベースセッション
+
+    Returns:
+        HPCP特徴量のバイナリデータ
+
+    Raises:
+        HTTPException: HPCP特徴量が見つからない、または読み出せない場合
+    """
+    hpcp_array = _get_stored_hpcp_array(db, recording_id)
+
+    return _hpcp_binary_response(hpcp_array)
+
+
+@router.get("/stats", response_model=VectorStats)
+async def get_vector_stats() -> VectorStats:
     """ベクトルデータベースの統計情報を取得する.
 
     Returns:
         ベクトルデータベースの統計情報
     """
-    vec_manager = None
     try:
-        vec_manager = SQLiteVecManager()
-        stats = vec_manager.get_vector_stats()
-        return stats
+        return VectorStats(**get_vec_manager().get_vector_stats())
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"統計情報の取得に失敗しました: {str(e)}"
         ) from e
-    finally:
-        if vec_manager:
-            vec_manager.close()
@@ -1,20 +1,29 @@
 """録音データ管理APIエンドポイント."""
 
+import asyncio
 import time
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app.core.vector.sqlite_vec_manager import SQLiteVecManager
+from app.api.v1.hpcp import extract_hpcp_from_upload
+from app.core.matching.cache import reference_feature_cache
+from app.core.vector.sqlite_vec_manager import get_vec_manager
 from app.db.crud import (
     create_hpcp_feature,
     create_recording,
     create_song,
-    get_song,
+    get_recording,
     get_recordings,
+    get_song,
 )
 from app.db.database import get_db
 from app.schemas.hpcp import (
+    HPCPExtractionRequest,
     RecordingCreateRequest,
     RecordingCreateResponse,
     RecordingInfo,
@@ -24,16 +33,29 @@ from app.schemas.hpcp import (
 router = APIRouter(prefix="/recordings", tags=["Recordings"])
 
 
-@router.post("/create", response_model=RecordingCreateResponse)
-async def create_recording_with_hpcp(
-    request: RecordingCreateRequest,
-    db: Session = Depends(get_db),
+async def _create_recording_with_hpcp_array(
+    db: Session,
+    hpcp_array: np.ndarray,
+    recording_name: str,
+    audio_file_name: str,
+    song_id: int | None,
+    title: str | None,
+    artist: str | None,
+    start_time: float,
+    duration: float | None = None,
 ) -> RecordingCreateResponse:
-    """HPCP特徴量を含む録音データを作成する.
+    """HPCP特徴量から録音データを作成し、ベクトルDBに格納する.
 
     Args:
-        request: 録音データ作成リクエスト
         db: データベースセッション
+        hpcp_array: HPCP特徴量のnumpy配列（フレーム数 x 12）
+        recording_name: 音源名
+        audio_file_name: 元の音声ファイル名
+        song_id: 既存楽曲ID（既存楽曲に音源を追加する場合）
+        title: 楽曲タイトル（新規楽曲作成の場合）
+        artist: アーティスト名（新規楽曲作成の場合）
+        start_time: 処理時間の計測開始時刻
+        duration: 音源の長さ（秒）。Noneの場合はHPCP特徴量のフレーム数から推定
 
     Returns:
         作成された録音データと楽曲情報
@@ -41,34 +63,23 @@ async def create_recording_with_hpcp(
     Raises:
         HTTPException: 各種エラー
     """
-    start_time = time.time()
-    vec_manager = None
-
     try:
-        # HPCP特徴量を復元
-        try:
-            hpcp_array = request.to_hpcp_array()
-        except Exception as e:
-            raise HTTPException(
-                status_code=400, detail=f"HPCP特徴量の復元に失敗しました: {str(e)}"
-            ) from e
-
         # 楽曲データを作成または取得
         try:
-            if request.song_id:
+            if song_id:
                 # 既存楽曲への音源追加
-                song = get_song(db, request.song_id)
+                song = get_song(db, song_id)
                 if not song:
                     raise HTTPException(
                         status_code=404,
-                        detail=f"楽曲ID {request.song_id} が見つかりません",
+                        detail=f"楽曲ID {song_id} が見つかりません",
                     )
             else:
                 # 新規楽曲作成
                 song = create_song(
                     db=db,
-                    title=request.title.strip(),
-                    artist=request.artist.strip() if request.artist else None,
+                    title=title.strip(),
+                    artist=artist.strip() if artist else None,
                 )
         except HTTPException:
             raise
@@ -79,20 +90,21 @@ async def create_recording_with_hpcp(
 
         # 音声ファイルの保存（実際のファイル処理は省略、ファイル名のみ保存）
         # 注意: 実際の実装では音声ファイルの永続化処理が必要
-        audio_path = f"uploads/{request.audio_file_name}"
+        audio_path = f"uploads/{audio_file_name}"
 
         # データベースに録音データを保存
         try:
-            # 音源の長さと sample_rate を HPCP特徴量から推定
-            duration = (
-                hpcp_array.shape[0] * 2048 / 44100.0
-            )  # フレーム数 * hop_size / sample_rate
+            # 音源の長さが不明な場合は HPCP特徴量から推定
+            if duration is None:
+                duration = (
+                    hpcp_array.shape[0] * 2048 / 44100.0
+                )  # フレーム数 * hop_size / sample_rate
             sample_rate = 44100  # デフォルト値
 
             recording = create_recording(
                 db=db,
                 song_id=song.id,
-                recording_name=request.recording_name.strip(),
+                recording_name=recording_name.strip(),
                 duration=duration,
                 sample_rate=sample_rate,
                 audio_path=audio_path,
@@ -111,24 +123,25 @@ async def create_recording_with_hpcp(
                 hpcp_array=hpcp_array,
                 hop_size=hop_size,
             )
+            # 同じIDで古い派生特徴量が残っていれば破棄する
+            reference_feature_cache.invalidate(recording.id)
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"HPCP特徴量の保存に失敗しました: {str(e)}"
             ) from e
 
         # sqlite-vecにベクトルデータを格納
+        # フレーム数分の書き込みが発生するため、スレッドプールで実行して
+        # イベントループを止めないようにする
         vector_stored = False
         try:
-            vec_manager = SQLiteVecManager()
-            vec_manager.initialize_vector_tables()
-            vec_manager.store_hpcp_vectors(recording.id, hpcp_array)
+            await asyncio.to_thread(
+                get_vec_manager().store_hpcp_vectors, recording.id, hpcp_array
+            )
             vector_stored = True
         except Exception as e:
             # ベクトル格納エラーは警告レベルとし、APIは成功として扱う
             print(f"警告: ベクトルデータの格納に失敗しました: {str(e)}")
-        finally:
-            if vec_manager:
-                vec_manager.close()
 
         # 処理時間計算
         processing_time = time.time() - start_time
@@ -166,9 +179,110 @@ async def create_recording_with_hpcp(
         raise HTTPException(
             status_code=500, detail=f"処理中に内部エラーが発生しました: {str(e)}"
         ) from e
-    finally:
-        if vec_manager:
-            vec_manager.close()
+
+
+@router.post("/create", response_model=RecordingCreateResponse)
+async def create_recording_with_hpcp(
+    request: RecordingCreateRequest,
+    db: Session = Depends(get_db),
+) -> RecordingCreateResponse:
+    """HPCP特徴量を含む録音データを作成する.
+
+    Args:
+        request: 録音データ作成リクエスト
+        db: データベースセッション
+
+    Returns:
+        作成された録音データと楽曲情報
+
+    Raises:
+        HTTPException: 各種エラー
+    """
+    start_time = time.time()
+
+    # HPCP特徴量を復元
+    try:
+        hpcp_array = request.to_hpcp_array()
+    except Exception as e:
+        raise HTTPException(
+            status_code=400, detail=f"HPCP特徴量の復元に失敗しました: {str(e)}"
+        ) from e
+
+    return await _create_recording_with_hpcp_array(
+        db,
+        hpcp_array,
+        recording_name=request.recording_name,
+        audio_file_name=request.audio_file_name,
+        song_id=request.song_id,
+        title=request.title,
+        artist=request.artist,
+        start_time=start_time,
+    )
+
+
+@router.post("/create/audio", response_model=RecordingCreateResponse)
+async def create_recording_from_audio(
+    file: Annotated[UploadFile, File(description="音声ファイル")],
+    recording_name: Annotated[str, Form(description="音源名")],
+    song_id: Annotated[
+        int | None, Form(description="既存楽曲ID（既存楽曲に音源を追加する場合）")
+    ] = None,
+    title: Annotated[
+        str | None, Form(description="楽曲タイトル（新規楽曲作成の場合）")
+    ] = None,
+    artist: Annotated[
+        str | None, Form(description="アーティスト名（新規楽曲作成の場合）")
+    ] = None,
+    db: Session = Depends(get_db),
+) -> RecordingCreateResponse:
+    """音声ファイルからHPCP特徴量を抽出し、そのまま録音データを作成する.
+
+    /hpcp/extract-only と /recordings/create を1回のリクエストで行う。
+    音声ファイルのアップロードが1回で済み、HPCP特徴量をクライアントと
+    やり取りしない。
+
+    Args:
+        file: アップロードされた音声ファイル
+        recording_name: 音源名
+        song_id: 既存楽曲ID（既存楽曲に音源を追加する場合）
+        title: 楽曲タイトル（新規楽曲作成の場合）
+        artist: アーティスト名（新規楽曲作成の場合）
+        db: データベースセッション
+
+    Returns:
+        作成された録音データと楽曲情報
+
+    Raises:
+        HTTPException: 各種エラー（ファイル形式、処理エラー等）
+        RequestValidationError: 楽曲情報の指定が不正な場合
+    """
+    start_time = time.time()
+
+    # 音声の処理より先に、JSON版と同じスキーマで楽曲情報を検証する
+    try:
+        song_request = HPCPExtractionRequest(
+            song_id=song_id, title=title, artist=artist, recording_name=recording_name
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+
+    # 録音データに元の音声ファイル名を記録するため、ファイル名は必須
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="ファイル名が指定されていません")
+
+    hpcp_array, duration = await extract_hpcp_from_upload(file)
+
+    return await _create_recording_with_hpcp_array(
+        db,
+        hpcp_array,
+        recording_name=song_request.recording_name,
+        audio_file_name=file.filename,
+        song_id=song_request.song_id,
+        title=song_request.title,
+        artist=song_request.artist,
+        start_time=start_time,
+        duration=duration,
+    )
 
 
 @router.get("/", response_model=list[RecordingInfo])
@@ -241,8 +355,6 @@ async def get_recording_detail(
     Raises:
         HTTPException: 録音データが見つからない場合
     """
-    from app.db.crud import get_recording
-
     recording = get_recording(db, recording_id)
     if not recording:
         raise HTTPException(status_code=404, detail="録音データが見つかりません")
@@ -1,38 +1,74 @@
-"""HPCP特徴抽出モジュール."""
+"""HPCP特徴抽出モジュール.
+
+Essentiaは読み込みに時間がかかるため、モジュールの読み込み時ではなく
+音声処理を行う関数の初回呼び出し時にインポートする。
+"""
 
 from pathlib import Path
 
-import essentia.standard as es  # type: ignore
 import numpy as np
 
 
-def extract_hpcp(audio_path: Path, sample_rate: int = 44100) -> np.ndarray:
-    """音声ファイルからHPCP特徴を抽出する.
+def load_audio(audio_path: Path, sample_rate: int = 44100) -> np.ndarray:
+    """音声ファイルをモノラル信号として読み込む.
 
     Args:
         audio_path: 音声ファイルのパス
         sample_rate: サンプルレート（デフォルト: 44100Hz）
 
     Returns:
-        HPCP特徴行列（フレーム数 x 12）
+        モノラル音声信号
 
     Raises:
-        RuntimeError: Essentiaでの処理中にエラーが発生した場合
         FileNotFoundError: 音声ファイルが存在しない場合
     """
     if not audio_path.exists():
         raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
 
+    import essentia.standard as es  # type: ignore
+
+    loader = es.MonoLoader(filename=str(audio_path), sampleRate=sample_rate)
+    return loader()
+
+
+def extract_hpcp_from_audio(audio: np.ndarray, sample_rate: int = 44100) -> np.ndarray:
+    """読み込み済みの音声信号からHPCP特徴を抽出する.
+
+    Args:
+        audio: モノラル音声信号
+        sample_rate: 音声信号のサンプルレート（デフォルト: 44100Hz）
+
+    Returns:
+        HPCP特徴行列（フレーム数 x 12）
+
+    Raises:
+        RuntimeError: Essentiaでの処理中にエラーが発生した場合
+    """
     try:
-        # 音声ファイルを読み込み
-        loader = es.MonoLoader(filename=str(audio_path), sampleRate=sample_rate)
-        audio = loader()
+        import essentia  # type: ignore
+        import essentia.streaming as ess  # type: ignore
+
+        # ストリーミングモードでネットワークを構築し、フレーム単位の処理を
+        # すべてEssentia(C++)側で完結させる
+        pool = essentia.Pool()
+
+        # 音声信号を入力
+        vector_input = ess.VectorInput(np.asarray(audio, dtype=np.float32))
+
+        # フレーム分割
+        frame_size = 4096
+        hop_size = 2048
+        frame_cutter = ess.FrameCutter(
+            frameSize=frame_size, hopSize=hop_size, startFromZero=True
+        )
+        windowing = ess.Windowing(type="blackmanharris62")
+        spectrum = ess.Spectrum(size=frame_size)
 
         # スペクトラルピークを検出
-        spectral_peaks = es.SpectralPeaks()
+        spectral_peaks = ess.SpectralPeaks()
 
         # HPCP抽出器を初期化
-        hpcp = es.HPCP(
+        hpcp = ess.HPCP(
             size=12,
             referenceFrequency=440,
             sampleRate=sample_rate,
@@ -46,25 +82,24 @@ def extract_hpcp(audio_path: Path, sample_rate: int = 44100) -> np.ndarray:
             windowSize=1.0,
         )
 
-        # フレーム分割
-        frame_size = 4096
-        hop_size = 2048
-        windowing = es.Windowing(type="blackmanharris62")
-        spectrum = es.Spectrum(size=frame_size)
+        # VectorInput → FrameCutter → Windowing → Spectrum → SpectralPeaks → HPCP
+        vector_input.data >> frame_cutter.signal
+        frame_cutter.frame >> windowing.frame
+        windowing.frame >> spectrum.frame
+        spectrum.spectrum >> spectral_peaks.spectrum
+        spectral_peaks.frequencies >> hpcp.frequencies
+        spectral_peaks.magnitudes >> hpcp.magnitudes
+        hpcp.hpcp >> (pool, "tonal.hpcp")
 
         # HPCP特徴を計算
-        hpcps = []
-        for frame in es.FrameGenerator(
-            audio, frameSize=frame_size, hopSize=hop_size, startFromZero=True
-        ):
-            windowed_frame = windowing(frame)
-            spec = spectrum(windowed_frame)
-            frequencies, magnitudes = spectral_peaks(spec)
-            hpcp_vector = hpcp(frequencies, magnitudes)
-            hpcps.append(hpcp_vector)
-
-        # numpy配列に変換
-        hpcp_array = np.array(hpcps)
+        essentia.run(vector_input)
+
+        # フレームが1つも得られなかった場合はプールにキーが作られない
+        if "tonal.hpcp" not in pool.descriptorNames():
+            return np.empty((0, 12), dtype=np.float32)
+
+        # Essentiaの出力と同じfloat32のままnumpy配列に変換
+        hpcp_array = np.asarray(pool["tonal.hpcp"], dtype=np.float32)
 
         return hpcp_array
 
@@ -72,6 +107,30 @@ def extract_hpcp(audio_path: Path, sample_rate: int = 44100) -> np.ndarray:
         raise RuntimeError(f"HPCP特徴抽出中にエラーが発生しました: {e}") from e
 
 
+def extract_hpcp(audio_path: Path, sample_rate: int = 44100) -> np.ndarray:
+    """音声ファイルからHPCP特徴を抽出する.
+
+    Args:
+        audio_path: 音声ファイルのパス
+        sample_rate: サンプルレート（デフォルト: 44100Hz）
+
+    Returns:
+        HPCP特徴行列（フレーム数 x 12）
+
+    Raises:
+        RuntimeError: Essentiaでの処理中にエラーが発生した場合
+        FileNotFoundError: 音声ファイルが存在しない場合
+    """
+    try:
+        audio = load_audio(audio_path, sample_rate=sample_rate)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"HPCP特徴抽出中にエラーが発生しました: {e}") from e
+
+    return extract_hpcp_from_audio(audio, sample_rate=sample_rate)
+
+
 def normalize_hpcp(hpcp_array: np.ndarray) -> np.ndarray:
     """HPCP特徴を正規化する.
 
@@ -79,8 +138,11 @@ def normalize_hpcp(hpcp_array: np.ndarray) -> np.ndarray:
         hpcp_array: HPCP特徴行列
 
     Returns:
-        正規化されたHPCP特徴行列
+        正規化されたHPCP特徴行列（float32）
     """
+    # float64の入力もfloat32に揃え、後段の類似度計算の帯域幅を抑える
+    hpcp_array = np.asarray(hpcp_array, dtype=np.float32)
+
     # フレーム毎に正規化（L2ノルム）
     norms = np.linalg.norm(hpcp_array, axis=1, keepdims=True)
     # ゼロ除算を防ぐ
@@ -0,0 +1,93 @@
+"""参照音声の派生特徴量キャッシュモジュール."""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import RLock
+
+from app.core.matching.similarity import HPCPFeatures
+
+
+class ReferenceFeatureCache:
+    """録音データIDをキーとした派生特徴量のLRUキャッシュ.
+
+    類似楽曲検索では候補ごとにDBからHPCP特徴量を読み出し、ヒストグラムや
+    時系列特徴を再計算していた。これらは録音データごとに不変なため、
+    プロセス内で保持して再利用する。複数スレッドから参照されるため
+    すべての操作をロックで保護する。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """初期化.
+
+        Args:
+            capacity: 保持する録音データ数の上限
+            ttl: エントリの有効期間（秒）
+            clock: 現在時刻（秒）を返す関数（テストで差し替える）
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[int, tuple[float, HPCPFeatures]] = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, recording_id: int) -> HPCPFeatures | None:
+        """キャッシュから派生特徴量を取得する.
+
+        Args:
+            recording_id: 録音データID
+
+        Returns:
+            派生特徴量、存在しないか有効期限切れの場合はNone
+        """
+        with self._lock:
+            entry = self._entries.get(recording_id)
+            if entry is None:
+                return None
+
+            stored_at, features = entry
+            if self._clock() - stored_at > self.ttl:
+                del self._entries[recording_id]
+                return None
+
+            # 最近使用したエントリとして末尾へ移動
+            self._entries.move_to_end(recording_id)
+            return features
+
+    def put(self, recording_id: int, features: HPCPFeatures):
+        """派生特徴量をキャッシュに格納する.
+
+        Args:
+            recording_id: 録音データID
+            features: 派生特徴量
+        """
+        with self._lock:
+            self._entries[recording_id] = (self._clock(), features)
+            self._entries.move_to_end(recording_id)
+
+            # 上限を超えた分は最も古く使われたエントリから破棄
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, recording_id: int):
+        """指定した録音データのエントリを破棄する.
+
+        Args:
+            recording_id: 録音データID
+        """
+        with self._lock:
+            self._entries.pop(recording_id, None)
+
+    def clear(self):
+        """すべてのエントリを破棄する."""
+        with self._lock:
+            self._entries.clear()
+
+
+# プロセス内で共有する参照特徴量キャッシュ
+reference_feature_cache = ReferenceFeatureCache()
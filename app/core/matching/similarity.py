@@ -1,7 +1,13 @@
 """高度な音声の同一性判定モジュール."""
 
+from typing import NamedTuple
+
 import numpy as np
 
+# 転調量ごとの巡回インデックス行列
+# mean[_SHIFT_IDX[shift]] が np.roll(mean, shift) と等しくなる
+_SHIFT_IDX = (np.arange(12)[None, :] - np.arange(12)[:, None]) % 12
+
 
 def calculate_hpcp_histogram(hpcp: np.ndarray, bins: int = 24) -> np.ndarray:
     """HPCP特徴のヒストグラムを計算する.
@@ -14,14 +20,81 @@ def calculate_hpcp_histogram(hpcp: np.ndarray, bins: int = 24) -> np.ndarray:
         正規化されたヒストグラム
     """
     # 各ピッチクラスの強度分布を計算
-    histograms = []
-    for i in range(12):
-        hist, _ = np.histogram(hpcp[:, i], bins=bins, range=(0, 1))
-        histograms.append(hist)
+    # np.histogram(range=(0, 1))と同様に範囲外の値は除外し、1.0は最終ビンに含める
+    in_range = (hpcp >= 0.0) & (hpcp <= 1.0)
+    bin_indices = np.minimum(
+        (np.where(in_range, hpcp, 0.0) * bins).astype(np.intp), bins - 1
+    )
+
+    # ピッチクラスごとにビン番号をずらして1次元化し、1回のbincountで集計
+    flat_indices = (bin_indices + np.arange(12) * bins)[in_range]
+    histogram = np.bincount(flat_indices, minlength=12 * bins).astype(np.float32)
+
+    # 正規化
+    return histogram / (np.sum(histogram) + np.float32(1e-6))
+
+
+def _segment_moments(
+    hpcp: np.ndarray, n_segments: int = 10
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """セグメントごとの和と二乗和を計算する.
+
+    平均HPCPと時系列特徴はどちらもこの集計結果から求められるため、
+    HPCP特徴行列の走査を共通化する。
+
+    Args:
+        hpcp: HPCP特徴行列
+        n_segments: セグメント数
+
+    Returns:
+        (セグメントごとの和, 二乗和, フレーム数)のタプル
+        （和と二乗和は セグメント数 x 12、フレーム数は セグメント数 x 1）
+    """
+    segment_size = len(hpcp) // n_segments
+
+    # 先頭のセグメントは等長なので(セグメント, フレーム, 12)に整形して一括集計し、
+    # 端数を含む最終セグメントのみ別途集計する
+    head = hpcp[: (n_segments - 1) * segment_size].reshape(
+        n_segments - 1, segment_size, hpcp.shape[1]
+    )
+    tail = hpcp[(n_segments - 1) * segment_size :]
+
+    # 桁落ちを避けるため集計はfloat64で行う
+    sums = np.vstack(
+        [head.sum(axis=1, dtype=np.float64), tail.sum(axis=0, dtype=np.float64)]
+    )
+    # 二乗した一時配列を作らずに二乗和を求める
+    squared_sums = np.vstack(
+        [
+            np.einsum("sfk,sfk->sk", head, head, dtype=np.float64),
+            np.einsum("fk,fk->k", tail, tail, dtype=np.float64),
+        ]
+    )
+    counts = np.array([segment_size] * (n_segments - 1) + [len(tail)], dtype=np.float64)
+
+    return sums, squared_sums, counts[:, None]
+
+
+def _temporal_features_from_moments(
+    sums: np.ndarray, squared_sums: np.ndarray, counts: np.ndarray
+) -> np.ndarray:
+    """セグメントごとの和と二乗和から時系列特徴を計算する.
 
-    # 結合して正規化
-    histogram = np.concatenate(histograms)
-    return histogram / (np.sum(histogram) + 1e-6)
+    Args:
+        sums: セグメントごとの和
+        squared_sums: セグメントごとの二乗和
+        counts: セグメントごとのフレーム数
+
+    Returns:
+        時系列特徴ベクトル
+    """
+    # セグメントの平均と標準偏差
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        variances = np.maximum(squared_sums / counts - means**2, 0.0)
+    stds = np.sqrt(variances)
+
+    return np.concatenate([means, stds], axis=1).astype(np.float32).ravel()
 
 
 def calculate_temporal_features(hpcp: np.ndarray) -> np.ndarray:
@@ -34,118 +107,218 @@ def calculate_temporal_features(hpcp: np.ndarray) -> np.ndarray:
         時系列特徴ベクトル
     """
     # セグメント分割（10分割）
-    n_segments = 10
-    segment_size = len(hpcp) // n_segments
+    return _temporal_features_from_moments(*_segment_moments(hpcp, n_segments=10))
 
-    segment_features = []
-    for i in range(n_segments):
-        start = i * segment_size
-        end = (i + 1) * segment_size if i < n_segments - 1 else len(hpcp)
-        segment = hpcp[start:end]
 
-        # セグメントの平均と標準偏差
-        mean = np.mean(segment, axis=0)
-        std = np.std(segment, axis=0)
-        segment_features.extend(mean)
-        segment_features.extend(std)
+def _find_best_shifts(
+    mean_query: np.ndarray, reference_means: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """12通りの転調から平均HPCPが最も一致する転調量を参照ごとに探索する.
 
-    return np.array(segment_features)
+    np.rollによる12回の配列生成を避け、巡回インデックス行列で全転調を
+    (12, 12)の行列として一度に作り、全参照に対して行列積でまとめて評価する。
 
+    Args:
+        mean_query: L2正規化済みのクエリ平均HPCP（12次元）
+        reference_means: L2正規化済みの参照平均HPCPを積み重ねた行列（参照数 x 12）
 
-def calculate_similarity_advanced(
-    hpcp_query: np.ndarray, hpcp_reference: np.ndarray
-) -> float:
-    """高度な特徴を使用して類似度を計算する.
+    Returns:
+        (参照ごとの最適な転調量, その転調での類似度)のタプル
+    """
+    # 距離を内積から求める際の桁落ちを抑えるため、倍精度で計算する
+    # （行列は参照数 x 12と小さく、変換のコストは無視できる）
+    mean_query = mean_query.astype(np.float64)
+    reference_means = reference_means.astype(np.float64)
+    shifted_queries = mean_query[_SHIFT_IDX]
+
+    # コサイン類似度に加えてユークリッド距離も考慮（参照数 x 転調数）
+    cosine_sim_raw = reference_means @ shifted_queries.T
+    # コサイン類似度を0-1範囲にマッピング
+    cosine_sim = (cosine_sim_raw + 1) / 2
+    # 差分配列を作らず、内積から |a - b|^2 = |a|^2 + |b|^2 - 2a・b で距離を求める
+    # 正規化済みなら sqrt(2(1 - cos)) と等しいが、ゼロベクトルや正規化時の
+    # イプシロンの影響を受けないよう実際のノルムを用いる
+    # （巡回シフトしてもノルムは変わらないため、クエリ側はスカラー1つでよい）
+    query_sq_norm = np.dot(mean_query, mean_query)
+    reference_sq_norms = np.einsum("ij,ij->i", reference_means, reference_means)
+    euclidean_dist = np.sqrt(
+        np.maximum(
+            query_sq_norm + reference_sq_norms[:, None] - 2 * cosine_sim_raw, 0.0
+        )
+    )
+    # 距離を類似度に変換（0-1範囲）
+    distance_sim = 1.0 / (1.0 + euclidean_dist)
+    # 調和平均で組み合わせ
+    combined_sim = 2 * cosine_sim * distance_sim / (cosine_sim + distance_sim + 1e-6)
+
+    best_shifts = np.argmax(combined_sim, axis=1)
+    best_similarities = np.take_along_axis(combined_sim, best_shifts[:, None], axis=1)[
+        :, 0
+    ]
+    return best_shifts, best_similarities
+
+
+class HPCPFeatures(NamedTuple):
+    """類似度計算に用いるHPCP派生特徴量.
+
+    参照側の特徴量は録音データごとに不変なため、一度計算したものを
+    キャッシュして再利用できるよう、計算処理と類似度評価を分離している。
+    """
+
+    mean: np.ndarray  # L2正規化済みの平均HPCP（12次元）
+    histogram: np.ndarray  # HPCPヒストグラム（bins=32）
+    temporal: np.ndarray  # L2正規化済みの時系列特徴
+    frame_count: int  # フレーム数
+
+
+def compute_similarity_features(hpcp: np.ndarray) -> HPCPFeatures:
+    """HPCP特徴行列から類似度計算用の派生特徴量を計算する.
 
     Args:
-        hpcp_query: クエリ音声のHPCP特徴行列
-        hpcp_reference: 参照音声のHPCP特徴行列
+        hpcp: HPCP特徴行列
 
     Returns:
-        similarity_score: 類似度スコア（0.0-1.0）
+        類似度計算用の派生特徴量
     """
-    # 1. グローバル特徴（平均HPCP）- より厳密な比較
-    mean_query = np.mean(hpcp_query, axis=0)
-    mean_reference = np.mean(hpcp_reference, axis=0)
+    # 帯域幅を抑えるためfloat32で計算する
+    hpcp = np.asarray(hpcp, dtype=np.float32)
+
+    # セグメントごとの集計を1回だけ行い、平均HPCPと時系列特徴で共有する
+    sums, squared_sums, counts = _segment_moments(hpcp, n_segments=10)
+
+    # グローバル特徴（平均HPCP）
+    mean = (sums.sum(axis=0) / len(hpcp)).astype(np.float32)
+    mean = mean / (np.linalg.norm(mean) + 1e-6)
+
+    # ヒストグラム特徴（ビン数を増やして精度向上）
+    histogram = calculate_hpcp_histogram(hpcp, bins=32)
+
+    # 時系列特徴
+    temporal = _temporal_features_from_moments(sums, squared_sums, counts)
+    temporal = temporal / (np.linalg.norm(temporal) + 1e-6)
+
+    return HPCPFeatures(
+        mean=mean,
+        histogram=histogram,
+        temporal=temporal,
+        frame_count=len(hpcp),
+    )
 
-    # 正規化
-    mean_query = mean_query / (np.linalg.norm(mean_query) + 1e-6)
-    mean_reference = mean_reference / (np.linalg.norm(mean_reference) + 1e-6)
-
-    # 最適な転調を見つける（より厳密）
-    global_similarities = []
-    for shift in range(12):
-        shifted_query = np.roll(mean_query, shift)
-        # コサイン類似度に加えてユークリッド距離も考慮
-        cosine_sim_raw = np.dot(shifted_query, mean_reference)
-        # コサイン類似度を0-1範囲にマッピング
-        cosine_sim = (cosine_sim_raw + 1) / 2
-        euclidean_dist = np.linalg.norm(shifted_query - mean_reference)
-        # 距離を類似度に変換（0-1範囲）
-        distance_sim = 1.0 / (1.0 + euclidean_dist)
-        # 調和平均で組み合わせ
-        combined_sim = (
-            2 * cosine_sim * distance_sim / (cosine_sim + distance_sim + 1e-6)
-        )
-        global_similarities.append(combined_sim)
 
-    best_shift = np.argmax(global_similarities)
-    global_similarity = global_similarities[best_shift]
+def calculate_similarity_batch(
+    query: HPCPFeatures, references: list[HPCPFeatures]
+) -> np.ndarray:
+    """1つのクエリと複数の参照の類似度をまとめて計算する.
+
+    参照側の特徴量を行列に積み重ね、候補ごとのPythonループではなく
+    行列演算で全候補を一度に評価する。
+
+    Args:
+        query: クエリ音声の派生特徴量
+        references: 参照音声の派生特徴量のリスト
+
+    Returns:
+        参照ごとの類似度スコア（0.0-1.0）の配列
+    """
+    if not references:
+        return np.empty(0)
+
+    # 1. グローバル特徴（平均HPCP）- 最適な転調を見つける（より厳密）
+    reference_means = np.stack([reference.mean for reference in references])
+    best_shifts, global_similarity = _find_best_shifts(query.mean, reference_means)
 
     # 2. ヒストグラム特徴（より識別力の高い計算）
-    hist_query = calculate_hpcp_histogram(
-        hpcp_query, bins=32
-    )  # ビン数を増やして精度向上
-    hist_reference = calculate_hpcp_histogram(hpcp_reference, bins=32)
+    hist_query = query.histogram
+    hist_references = np.stack([reference.histogram for reference in references])
+    hist_diff = hist_query - hist_references
 
     # Earth Mover's Distance（EMD）風の計算
-    hist_similarity = 1.0 - np.sum(np.abs(hist_query - hist_reference)) / 2
+    hist_similarity = 1.0 - np.sum(np.abs(hist_diff), axis=1) / 2
 
     # カイ二乗距離も計算
-    chi2_distance = np.sum(
-        (hist_query - hist_reference) ** 2 / (hist_query + hist_reference + 1e-6)
-    )
+    chi2_distance = np.sum(hist_diff**2 / (hist_query + hist_references + 1e-6), axis=1)
     chi2_similarity = 1.0 / (1.0 + chi2_distance)
 
     # ヒストグラム類似度を改善
     hist_similarity = (hist_similarity + chi2_similarity) / 2
 
     # 3. 時系列特徴（最適転調でシフト）
-    shifted_hpcp_query = np.roll(hpcp_query, best_shift, axis=1)
-    temporal_query = calculate_temporal_features(shifted_hpcp_query)
-    temporal_reference = calculate_temporal_features(hpcp_reference)
-
-    # 正規化
-    temporal_query = temporal_query / (np.linalg.norm(temporal_query) + 1e-6)
-    temporal_reference = temporal_reference / (
-        np.linalg.norm(temporal_reference) + 1e-6
-    )
+    # HPCPの列を巡回シフトすると、時系列特徴もセグメントごとの平均・標準偏差が
+    # 同じだけ巡回シフトする。L2ノルムも変わらないため、HPCP特徴行列を
+    # np.rollで複製して再計算する代わりに、正規化済みの特徴を並べ替えるだけでよい
+    temporal_blocks = query.temporal.reshape(-1, 12)
+    temporal_queries = temporal_blocks[:, _SHIFT_IDX[best_shifts]].transpose(1, 0, 2)
+    temporal_queries = temporal_queries.reshape(len(references), -1)
+    # 平均HPCPと同様に、内積から距離を求める際の桁落ちを抑えるため倍精度にする
+    temporal_queries = temporal_queries.astype(np.float64)
+    temporal_references = np.stack(
+        [reference.temporal for reference in references]
+    ).astype(np.float64)
 
     # より厳密な時系列類似度計算
-    temporal_cosine = np.dot(temporal_query, temporal_reference)
-    temporal_euclidean_dist = np.linalg.norm(temporal_query - temporal_reference)
+    temporal_cosine = np.einsum("ij,ij->i", temporal_queries, temporal_references)
+    # 差分配列を作らず、内積とノルムから距離を求める
+    temporal_sq_norms = np.einsum("ij,ij->i", temporal_references, temporal_references)
+    temporal_euclidean_dist = np.sqrt(
+        np.maximum(
+            np.dot(temporal_queries[0], temporal_queries[0])
+            + temporal_sq_norms
+            - 2 * temporal_cosine,
+            0.0,
+        )
+    )
     temporal_distance_sim = 1.0 / (1.0 + temporal_euclidean_dist)
     temporal_similarity = (temporal_cosine + temporal_distance_sim) / 2
 
     # 4. 長さ比率による補正（テンポ変化対応）
-    length_ratio = min(len(hpcp_query), len(hpcp_reference)) / max(
-        len(hpcp_query), len(hpcp_reference)
+    reference_lengths = np.array([reference.frame_count for reference in references])
+    length_ratio = np.minimum(query.frame_count, reference_lengths) / np.maximum(
+        query.frame_count, reference_lengths
     )
     # テンポ変化が0.8倍～1.25倍の範囲内なら補正を適用
-    if length_ratio > 0.8:
-        length_penalty = 1.0
-    else:
-        length_penalty = 0.95  # 長さ差が大きい場合は少し減点
+    # 長さ差が大きい場合は少し減点
+    length_penalty = np.where(length_ratio > 0.8, 1.0, 0.95)
 
     # 重み付け平均（時系列特徴の重みを上げる）
     weights = [0.25, 0.25, 0.5]  # global, histogram, temporal
-    final_similarity = (
+    return (
         weights[0] * global_similarity
         + weights[1] * hist_similarity
         + weights[2] * temporal_similarity
     ) * length_penalty
 
-    return float(final_similarity)
+
+def calculate_similarity_from_features(
+    query: HPCPFeatures, reference: HPCPFeatures
+) -> float:
+    """計算済みの派生特徴量から類似度を計算する.
+
+    Args:
+        query: クエリ音声の派生特徴量
+        reference: 参照音声の派生特徴量
+
+    Returns:
+        similarity_score: 類似度スコア（0.0-1.0）
+    """
+    return float(calculate_similarity_batch(query, [reference])[0])
+
+
+def calculate_similarity_advanced(
+    hpcp_query: np.ndarray, hpcp_reference: np.ndarray
+) -> float:
+    """高度な特徴を使用して類似度を計算する.
+
+    Args:
+        hpcp_query: クエリ音声のHPCP特徴行列
+        hpcp_reference: 参照音声のHPCP特徴行列
+
+    Returns:
+        similarity_score: 類似度スコア（0.0-1.0）
+    """
+    return calculate_similarity_from_features(
+        compute_similarity_features(hpcp_query),
+        compute_similarity_features(hpcp_reference),
+    )
 
 
 def is_same_recording_advanced(
@@ -1,12 +1,21 @@
 """sqlite-vecを使用したベクトル検索管理クラス."""
 
 import sqlite3
+import threading
 from pathlib import Path
 
 import numpy as np
 import sqlite_vec
 from sqlite_vec import serialize_float32
 
+from app.core.audio.quantization import HPCP_FRAME_INT8_SCALE, quantize_frame_vectors
+from app.db.schema import create_vector_tables
+
+# ベクトルテーブルのページをメモリマップする上限サイズ（256MB）
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+# 接続ごとのページキャッシュサイズ（64MB、KiB単位）
+SQLITE_CACHE_SIZE_KIB = 64 * 1024
+
 
 class SQLiteVecManager:
     """sqlite-vecを使用したHPCP特徴量ベクトル検索管理クラス.
@@ -22,56 +31,51 @@ class SQLiteVecManager:
             db_path: データベースファイルのパス
         """
         self.db_path = Path(db_path)
-        self._connection: sqlite3.Connection | None = None
+        # sqlite3の接続はスレッドをまたいで共有できないため、スレッドごとに保持する
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
 
     def _get_connection(self) -> sqlite3.Connection:
         """データベース接続を取得する（sqlite-vec拡張付き）.
 
+        接続と拡張のロードはスレッドごとに一度だけ行い、以降は再利用する。
+
         Returns:
             sqlite3データベース接続
         """
-        if self._connection is None:
-            self._connection = sqlite3.connect(str(self.db_path))
-            self._connection.enable_load_extension(True)
-            sqlite_vec.load(self._connection)
-            self._connection.enable_load_extension(False)
-        return self._connection
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # クローズ時に他スレッドの接続もまとめて閉じられるようにする
+            connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            connection.enable_load_extension(True)
+            sqlite_vec.load(connection)
+            connection.enable_load_extension(False)
+
+            # SQLiteの設定を最適化（database.pyの接続設定に揃える）
+            connection.execute("PRAGMA journal_mode = WAL")  # Write-Ahead Logging
+            connection.execute("PRAGMA synchronous = NORMAL")  # パフォーマンス向上
+            connection.execute("PRAGMA temp_store = MEMORY")  # 一時ファイルをメモリに
+            connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+            connection.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KIB}")
+
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
 
     def close(self):
-        """データベース接続を閉じる."""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        """すべてのスレッドのデータベース接続を閉じる."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        # 以降のアクセスでは接続を作り直す
+        self._local = threading.local()
 
     def initialize_vector_tables(self):
         """ベクトル検索用テーブルを初期化する."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        # HPCP特徴量ベクトルテーブル（フレーム単位）
-        cursor.execute(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS hpcp_frames USING vec0(
-                recording_id INTEGER,
-                frame_index INTEGER,
-                hpcp_vector FLOAT[12]
-            )
-        """
-        )
-
-        # 楽曲レベル統計的特徴量ベクトルテーブル
-        cursor.execute(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS hpcp_summary USING vec0(
-                recording_id INTEGER,
-                mean_vector FLOAT[12],
-                std_vector FLOAT[12],
-                dominant_chord FLOAT[12]
-            )
-        """
-        )
-
-        conn.commit()
+        create_vector_tables(self._get_connection())
 
     def store_hpcp_vectors(self, recording_id: int, hpcp_array: np.ndarray):
         """HPCP特徴量をベクトルDBに格納する.
@@ -90,26 +94,33 @@ class SQLiteVecManager:
             )
 
         conn = self._get_connection()
-        cursor = conn.cursor()
 
-        # 既存のフレームデータを削除
-        cursor.execute(
-            "DELETE FROM hpcp_frames WHERE recording_id = ?", (recording_id,)
-        )
+        # KNN検索で走査するデータ量を減らすため、int8に量子化してシリアライズ
+        # （行ごとのバイト列がそのままベクトルになる）
+        hpcp_i8 = quantize_frame_vectors(hpcp_array)
+        frame_rows = [
+            (recording_id, frame_index, hpcp_vector.tobytes())
+            for frame_index, hpcp_vector in enumerate(hpcp_i8)
+        ]
+
+        # 削除から挿入までを1つのトランザクションで実行し、失敗時はロールバック
+        with conn:
+            cursor = conn.cursor()
 
-        # フレーム単位でベクトルを格納
-        for frame_index, hpcp_vector in enumerate(hpcp_array):
-            # float32形式でシリアライズ
-            vector_data = serialize_float32(hpcp_vector.astype(np.float32))
+            # 既存のフレームデータを削除
             cursor.execute(
-                "INSERT INTO hpcp_frames(recording_id, frame_index, hpcp_vector) VALUES (?, ?, ?)",
-                (recording_id, frame_index, vector_data),
+                "DELETE FROM hpcp_frames WHERE recording_id = ?", (recording_id,)
             )
 
-        # 楽曲レベル統計的特徴量を計算・格納
-        self._store_summary_vectors(cursor, recording_id, hpcp_array)
+            # フレーム単位のベクトルをまとめて格納
+            cursor.executemany(
+                "INSERT INTO hpcp_frames(recording_id, frame_index, hpcp_vector) "
+                "VALUES (?, ?, vec_int8(?))",
+                frame_rows,
+            )
 
-        conn.commit()
+            # 楽曲レベル統計的特徴量を計算・格納
+            self._store_summary_vectors(cursor, recording_id, hpcp_array)
 
     def _store_summary_vectors(
         self, cursor: sqlite3.Cursor, recording_id: int, hpcp_array: np.ndarray
@@ -147,16 +158,18 @@ class SQLiteVecManager:
         )
 
     def search_similar_recordings_by_frames(
-        self, query_hpcp: np.ndarray, k: int = 5
+        self, query_hpcp: np.ndarray, k: int = 5, max_distance: float | None = None
     ) -> list[tuple[int, float]]:
         """フレーム単位でのHPCP特徴量による類似楽曲検索.
 
         Args:
             query_hpcp: クエリHPCP特徴量配列（フレーム数 x 12）
             k: 取得する類似楽曲数
+            max_distance: 平均距離の上限（Noneの場合は制限しない）
 
         Returns:
             (recording_id, 平均距離)のタプルリスト
+            （距離は量子化前の0.0-1.0のスケールに換算した値）
         """
         if query_hpcp.ndim != 2 or query_hpcp.shape[1] != 12:
             raise ValueError(
@@ -167,44 +180,58 @@ class SQLiteVecManager:
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        # 各フレームに対して最も類似するベクトルを検索
-        recording_distances = {}
-
-        for frame_hpcp in query_hpcp:
-            vector_data = serialize_float32(frame_hpcp.astype(np.float32))
+        # クエリフレームを一時テーブルにまとめて格納
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS hpcp_query_frames(
+                frame_index INTEGER,
+                hpcp_vector BLOB
+            )
+        """
+        )
+        # 格納済みベクトルと同じスケールでint8に量子化する
+        query_i8 = quantize_frame_vectors(query_hpcp)
+        cursor.execute("DELETE FROM hpcp_query_frames")
+        cursor.executemany(
+            "INSERT INTO hpcp_query_frames(frame_index, hpcp_vector) VALUES (?, ?)",
+            (
+                (frame_index, frame_hpcp.tobytes())
+                for frame_index, frame_hpcp in enumerate(query_i8)
+            ),
+        )
 
-            # フレーム単位で類似検索
+        try:
+            # 各フレームに対して最も類似するベクトルをvec0のKNNクエリで検索し、
+            # 録音データごとの平均距離の集計までを1つのSQLで行う
+            # int8の距離は量子化スケール倍になるため、元のスケールに戻して扱う
             cursor.execute(
                 """
-                SELECT recording_id, distance
-                FROM hpcp_frames
-                WHERE hpcp_vector MATCH ?
-                ORDER BY distance
-                LIMIT 20
+                WITH frame_hits AS MATERIALIZED (
+                    SELECT f.recording_id AS recording_id, f.distance AS distance
+                    FROM hpcp_query_frames AS q
+                    JOIN hpcp_frames AS f
+                        ON f.hpcp_vector MATCH vec_int8(q.hpcp_vector) AND f.k = ?
+                )
+                SELECT recording_id, AVG(distance) / ? AS avg_distance
+                FROM frame_hits
+                GROUP BY recording_id
+                HAVING ? IS NULL OR avg_distance <= ?
+                ORDER BY avg_distance
+                LIMIT ?
             """,
-                (vector_data,),
+                (20, float(HPCP_FRAME_INT8_SCALE), max_distance, max_distance, k),
             )
-
-            results = cursor.fetchall()
-
-            # 録音データIDごとに距離を蓄積
-            for recording_id, distance in results:
-                if recording_id not in recording_distances:
-                    recording_distances[recording_id] = []
-                recording_distances[recording_id].append(distance)
-
-        # 各録音データの平均距離を計算
-        avg_distances = []
-        for recording_id, distances in recording_distances.items():
-            avg_distance = np.mean(distances)
-            avg_distances.append((recording_id, avg_distance))
-
-        # 距離でソートしてトップKを返す
-        avg_distances.sort(key=lambda x: x[1])
-        return avg_distances[:k]
+            return cursor.fetchall()
+        finally:
+            cursor.execute("DELETE FROM hpcp_query_frames")
+            conn.commit()
 
     def search_similar_recordings_by_summary(
-        self, query_hpcp: np.ndarray, k: int = 5, method: str = "mean"
+        self,
+        query_hpcp: np.ndarray,
+        k: int = 5,
+        method: str = "mean",
+        max_distance: float | None = None,
     ) -> list[tuple[int, float]]:
         """楽曲レベル統計的特徴量による類似楽曲検索.
 
@@ -212,6 +239,7 @@ class SQLiteVecManager:
             query_hpcp: クエリHPCP特徴量配列（フレーム数 x 12）
             k: 取得する類似楽曲数
             method: 検索方法 ("mean", "dominant", "std")
+            max_distance: 距離の上限（Noneの場合は制限しない）
 
         Returns:
             (recording_id, 距離)のタプルリスト
@@ -240,17 +268,21 @@ class SQLiteVecManager:
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        # ベクトル検索を実行
+        # ベクトル検索を実行（vec0のKNNクエリ）
+        # 距離の上限はSQL側で適用し、上限を超える候補は返さない
         vector_data = serialize_float32(query_vector)
         cursor.execute(
             f"""
             SELECT recording_id, distance
-            FROM hpcp_summary
-            WHERE {column_name} MATCH ?
+            FROM (
+                SELECT recording_id, distance
+                FROM hpcp_summary
+                WHERE {column_name} MATCH ? AND k = ?
+            )
+            WHERE ? IS NULL OR distance <= ?
             ORDER BY distance
-            LIMIT ?
         """,
-            (vector_data, k),
+            (vector_data, k, max_distance, max_distance),
         )
 
         return cursor.fetchall()
@@ -299,3 +331,31 @@ class SQLiteVecManager:
             "total_recordings": recording_count,
             "summary_records": summary_count,
         }
+
+
+# プロセス内で共有するベクトル検索管理インスタンス
+_vec_manager: SQLiteVecManager | None = None
+_vec_manager_lock = threading.Lock()
+
+
+def get_vec_manager() -> SQLiteVecManager:
+    """プロセス内で共有するSQLiteVecManagerを取得する.
+
+    リクエストごとに接続の作成や拡張のロードを行わないよう、
+    インスタンスを使い回す。
+
+    Returns:
+        共有のSQLiteVecManager
+    """
+    global _vec_manager
+    with _vec_manager_lock:
+        if _vec_manager is None:
+            _vec_manager = SQLiteVecManager()
+        return _vec_manager
+
+
+def close_vec_manager():
+    """共有のSQLiteVecManagerの接続を閉じる."""
+    with _vec_manager_lock:
+        if _vec_manager is not None:
+            _vec_manager.close()
@@ -1,12 +1,17 @@
 """データベースCRUD操作モジュール."""
 
-import pickle
+import logging
 from pathlib import Path
 
 import numpy as np
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from .models import HPCPFeature, Recording, Song
+from app.core.audio.quantization import dequantize_hpcp, quantize_hpcp
+from app.core.matching.similarity import HPCPFeatures, compute_similarity_features
+
+from .models import HPCPFeature, Recording, SimilarityFeature, Song
+
+logger = logging.getLogger(__name__)
 
 
 # Song関連のCRUD操作
@@ -38,7 +43,7 @@ def get_song(db: Session, song_id: int) -> Song | None:
     Returns:
         楽曲データ、存在しない場合はNone
     """
-    return db.query(Song).filter(Song.id == song_id).first()
+    return db.get(Song, song_id)
 
 
 def get_songs(db: Session, skip: int = 0, limit: int = 100) -> list[Song]:
@@ -125,7 +130,33 @@ def get_recording(db: Session, recording_id: int) -> Recording | None:
     Returns:
         録音データ、存在しない場合はNone
     """
-    return db.query(Recording).filter(Recording.id == recording_id).first()
+    return db.get(Recording, recording_id)
+
+
+def get_recordings_by_ids(
+    db: Session, recording_ids: list[int]
+) -> dict[int, Recording]:
+    """複数の録音データを楽曲データと合わせて1回のクエリで取得する.
+
+    Args:
+        db: データベースセッション
+        recording_ids: 録音データIDのリスト
+
+    Returns:
+        録音データIDをキー、録音データを値とする辞書
+        （存在しない録音データは含まれない）
+    """
+    if not recording_ids:
+        return {}
+
+    recordings = (
+        db.query(Recording)
+        .options(joinedload(Recording.song))
+        .filter(Recording.id.in_(recording_ids))
+        .all()
+    )
+
+    return {recording.id: recording for recording in recordings}
 
 
 def get_recordings(db: Session, skip: int = 0, limit: int = 100) -> list[Recording]:
@@ -166,6 +197,30 @@ def delete_recording(db: Session, recording_id: int) -> bool:
     return True
 
 
+def _serialize_vector(vector: np.ndarray) -> bytes:
+    """特徴ベクトルをfloat32のバイト列に変換する.
+
+    Args:
+        vector: 特徴ベクトル
+
+    Returns:
+        float32のバイト列
+    """
+    return np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+
+
+def _deserialize_vector(data: bytes) -> np.ndarray:
+    """float32のバイト列から特徴ベクトルを復元する.
+
+    Args:
+        data: float32のバイト列
+
+    Returns:
+        特徴ベクトル（読み取り専用）
+    """
+    return np.frombuffer(data, dtype=np.float32)
+
+
 def create_hpcp_feature(
     db: Session, recording_id: int, hpcp_array: np.ndarray, hop_size: int
 ) -> HPCPFeature:
@@ -189,9 +244,10 @@ def create_hpcp_feature(
             f"実際の形状: {hpcp_array.shape}"
         )
 
-    # numpy配列をバイナリ形式でシリアライズ
-    hpcp_data = pickle.dumps(hpcp_array)
+    hpcp_data = _serialize_hpcp(hpcp_array)
 
+    # 録音データごとに1件のみ保持するため、既存のHPCP特徴量は置き換える
+    db.query(HPCPFeature).filter(HPCPFeature.recording_id == recording_id).delete()
     db_hpcp = HPCPFeature(
         recording_id=recording_id,
         hpcp_data=hpcp_data,
@@ -199,6 +255,24 @@ def create_hpcp_feature(
         hop_size=hop_size,
     )
     db.add(db_hpcp)
+
+    # 検索時に再計算しなくて済むよう、類似度計算用の派生特徴量も保存する
+    # 格納データから復元した場合と一致するよう、量子化後の値から計算する
+    features = compute_similarity_features(
+        _deserialize_hpcp(hpcp_data, hpcp_array.shape[0])
+    )
+    db.query(SimilarityFeature).filter(
+        SimilarityFeature.recording_id == recording_id
+    ).delete()
+    db.add(
+        SimilarityFeature(
+            recording_id=recording_id,
+            mean_data=_serialize_vector(features.mean),
+            histogram_data=_serialize_vector(features.histogram),
+            temporal_data=_serialize_vector(features.temporal),
+            frame_count=features.frame_count,
+        )
+    )
     db.commit()
     db.refresh(db_hpcp)
     return db_hpcp
@@ -219,6 +293,44 @@ def get_hpcp_feature(db: Session, recording_id: int) -> HPCPFeature | None:
     )
 
 
+def _serialize_hpcp(hpcp_array: np.ndarray) -> bytes:
+    """HPCP特徴量をuint8に量子化したバイト列に変換する.
+
+    pickleを介さず、行優先のuint8配列をそのままバイト列として格納する。
+
+    Args:
+        hpcp_array: 正規化されたHPCP特徴量のnumpy配列（フレーム数 x 12）
+
+    Returns:
+        uint8に量子化したHPCP特徴量のバイト列（フレーム数 x 12 バイト）
+    """
+    return np.ascontiguousarray(quantize_hpcp(hpcp_array)).tobytes()
+
+
+def _deserialize_hpcp(hpcp_data: bytes, frame_count: int) -> np.ndarray:
+    """バイナリデータからHPCP特徴量のnumpy配列を復元する.
+
+    Args:
+        hpcp_data: uint8に量子化したHPCP特徴量のバイト列
+        frame_count: フレーム数
+
+    Returns:
+        HPCP特徴量のnumpy配列（float32）
+
+    Raises:
+        ValueError: バイト列の長さがフレーム数と一致しない場合
+    """
+    if len(hpcp_data) != frame_count * 12:
+        raise ValueError(
+            f"HPCP特徴量のデシリアライズに失敗しました: "
+            f"データ長 {len(hpcp_data)} がフレーム数 {frame_count} と一致しません"
+        )
+
+    # バイト列をコピーせずに配列として解釈し、浮動小数点数に戻す
+    hpcp_q = np.frombuffer(hpcp_data, dtype=np.uint8).reshape(frame_count, 12)
+    return dequantize_hpcp(hpcp_q)
+
+
 def get_hpcp_array(db: Session, recording_id: int) -> np.ndarray | None:
     """録音データのHPCP特徴量をnumpy配列として取得する.
 
@@ -236,13 +348,76 @@ def get_hpcp_array(db: Session, recording_id: int) -> np.ndarray | None:
     if not hpcp_feature:
         return None
 
-    try:
-        hpcp_array = pickle.loads(hpcp_feature.hpcp_data)
-        if not isinstance(hpcp_array, np.ndarray):
-            raise ValueError("デシリアライズされたデータがnumpy配列ではありません")
-        return hpcp_array
-    except (pickle.PickleError, ValueError) as e:
-        raise ValueError(f"HPCP特徴量のデシリアライズに失敗しました: {e}") from e
+    return _deserialize_hpcp(hpcp_feature.hpcp_data, hpcp_feature.frame_count)
+
+
+def get_hpcp_arrays(db: Session, recording_ids: list[int]) -> dict[int, np.ndarray]:
+    """複数の録音データのHPCP特徴量を1回のクエリでnumpy配列として取得する.
+
+    Args:
+        db: データベースセッション
+        recording_ids: 録音データIDのリスト
+
+    Returns:
+        録音データIDをキー、HPCP特徴量のnumpy配列を値とする辞書
+        （HPCP特徴量が存在しない、またはデシリアライズに失敗した録音データは
+        含まれない）
+    """
+    if not recording_ids:
+        return {}
+
+    hpcp_features = (
+        db.query(HPCPFeature).filter(HPCPFeature.recording_id.in_(recording_ids)).all()
+    )
+
+    hpcp_arrays = {}
+    for hpcp_feature in hpcp_features:
+        # 破損したデータが1件あっても、他の録音データの読み出しは続ける
+        try:
+            hpcp_arrays[hpcp_feature.recording_id] = _deserialize_hpcp(
+                hpcp_feature.hpcp_data, hpcp_feature.frame_count
+            )
+        except ValueError as e:
+            logger.warning(
+                "録音データ %s のHPCP特徴量を読み出せないためスキップします: %s",
+                hpcp_feature.recording_id,
+                e,
+            )
+
+    return hpcp_arrays
+
+
+def get_similarity_features(
+    db: Session, recording_ids: list[int]
+) -> dict[int, HPCPFeatures]:
+    """複数の録音データの類似度計算用派生特徴量を1回のクエリで取得する.
+
+    Args:
+        db: データベースセッション
+        recording_ids: 録音データIDのリスト
+
+    Returns:
+        録音データIDをキー、派生特徴量を値とする辞書
+        （派生特徴量が保存されていない録音データは含まれない）
+    """
+    if not recording_ids:
+        return {}
+
+    similarity_features = (
+        db.query(SimilarityFeature)
+        .filter(SimilarityFeature.recording_id.in_(recording_ids))
+        .all()
+    )
+
+    return {
+        similarity_feature.recording_id: HPCPFeatures(
+            mean=_deserialize_vector(similarity_feature.mean_data),
+            histogram=_deserialize_vector(similarity_feature.histogram_data),
+            temporal=_deserialize_vector(similarity_feature.temporal_data),
+            frame_count=similarity_feature.frame_count,
+        )
+        for similarity_feature in similarity_features
+    }
 
 
 def delete_hpcp_feature(db: Session, recording_id: int) -> bool:
@@ -260,5 +435,9 @@ def delete_hpcp_feature(db: Session, recording_id: int) -> bool:
         return False
 
     db.delete(hpcp_feature)
+    # HPCP特徴量から計算した派生特徴量も合わせて削除
+    db.query(SimilarityFeature).filter(
+        SimilarityFeature.recording_id == recording_id
+    ).delete()
     db.commit()
     return True
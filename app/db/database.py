@@ -1,14 +1,22 @@
 """データベース接続とセッション管理モジュール."""
 
+import sqlite3
 from collections.abc import Generator
 from pathlib import Path
+from typing import cast
 
 import sqlite_vec
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
+from .migration import (
+    ensure_hpcp_features_unique_index,
+    migrate_legacy_hpcp_features,
+)
+from .schema import create_vector_tables
+
 # データベースファイルのパス
 DATABASE_PATH = Path("utareco.db")
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
@@ -57,32 +65,34 @@ def create_tables():
 
 
 def init_database():
-    """データベースを初期化（テーブル作成とベクトル拡張設定）."""
+    """データベースを初期化（テーブル作成、旧形式データの移行とベクトル拡張設定）.
+
+    Raises:
+        RuntimeError: 旧形式のデータを移行できない場合
+    """
     create_tables()
 
-    # sqlite-vecテーブルの初期化
-    with SessionLocal() as db:
-        # HPCP特徴量ベクトルテーブル（フレーム単位）
-        db.execute(
-            text("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS hpcp_frames USING vec0(
-                recording_id INTEGER,
-                frame_index INTEGER,
-                hpcp_vector FLOAT[12]
-            )
-        """)
-        )
-
-        # 楽曲レベル統計的特徴量ベクトルテーブル
-        db.execute(
-            text("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS hpcp_summary USING vec0(
-                recording_id INTEGER,
-                mean_vector FLOAT[12],
-                std_vector FLOAT[12],
-                dominant_chord FLOAT[12]
+    raw_connection = engine.raw_connection()
+    try:
+        # 移行処理とベクトルテーブルの作成はsqlite3の接続を直接使う
+        connection = cast(sqlite3.Connection, raw_connection.driver_connection)
+
+        # 録音データごとに1件となるよう重複を削除し、ユニークインデックスを作成
+        removed_count = ensure_hpcp_features_unique_index(connection)
+        if removed_count:
+            print(f"重複したHPCP特徴量を{removed_count}件削除しました")
+
+        # pickle形式で格納されていた旧形式のHPCP特徴量を現在の形式に変換
+        migrated_count = migrate_legacy_hpcp_features(connection)
+        if migrated_count:
+            print(f"旧形式のHPCP特徴量を{migrated_count}件変換しました")
+
+        # sqlite-vecテーブルの初期化（接続時にsqlite-vec拡張はロード済み）
+        rebuilt_count = create_vector_tables(connection)
+        if rebuilt_count:
+            print(
+                "旧形式のhpcp_framesテーブルを作り直し、"
+                f"{rebuilt_count}件の録音データのベクトルを再登録しました"
             )
-        """)
-        )
-
-        db.commit()
+    finally:
+        raw_connection.close()
@@ -0,0 +1,159 @@
+"""既存データベースのデータ移行モジュール."""
+
+import io
+import pickle
+import sqlite3
+
+import numpy as np
+
+from app.core.audio.quantization import quantize_hpcp
+
+# hpcp_features.recording_id のユニークインデックス名（SQLAlchemyの命名規則に合わせる）
+HPCP_FEATURES_RECORDING_ID_INDEX = "ix_hpcp_features_recording_id"
+
+# 旧形式のHPCP特徴量（pickleしたnumpy配列）の復元で読み込みを許可するクラス・関数
+_LEGACY_PICKLE_GLOBALS = {
+    ("numpy", "ndarray"),
+    ("numpy", "dtype"),
+    ("numpy.core.multiarray", "_reconstruct"),
+    ("numpy.core.numeric", "_frombuffer"),
+    ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy._core.numeric", "_frombuffer"),
+}
+
+
+class _LegacyHPCPUnpickler(pickle.Unpickler):
+    """numpy配列の復元に必要なクラス・関数のみを読み込むUnpickler."""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) not in _LEGACY_PICKLE_GLOBALS:
+            raise pickle.UnpicklingError(f"許可されていないクラスです: {module}.{name}")
+        return super().find_class(module, name)
+
+
+def _convert_legacy_hpcp(hpcp_data: bytes) -> np.ndarray:
+    """pickle形式で格納されていたHPCP特徴量を、uint8に量子化した配列に変換する.
+
+    Args:
+        hpcp_data: pickleしたHPCP特徴量のnumpy配列（floatまたはuint8）
+
+    Returns:
+        uint8に量子化したHPCP特徴量のnumpy配列（フレーム数 x 12）
+
+    Raises:
+        ValueError: pickleとして読み込めない、または形状が不正な場合
+    """
+    try:
+        hpcp_array = _LegacyHPCPUnpickler(io.BytesIO(hpcp_data)).load()
+    except Exception as e:
+        raise ValueError(f"pickleとして読み込めません: {e}") from e
+
+    if not isinstance(hpcp_array, np.ndarray):
+        raise ValueError("読み込んだデータがnumpy配列ではありません")
+    if hpcp_array.ndim != 2 or hpcp_array.shape[1] != 12:
+        raise ValueError(f"HPCP配列の形状が不正です: {hpcp_array.shape}")
+
+    # 量子化して格納していた時期のデータはそのまま使う
+    if hpcp_array.dtype == np.uint8:
+        return hpcp_array
+    return quantize_hpcp(hpcp_array)
+
+
+def migrate_legacy_hpcp_features(connection: sqlite3.Connection) -> int:
+    """pickle形式で格納された旧形式のHPCP特徴量を現在の形式に変換する.
+
+    旧形式のデータは、バイト列の長さがフレーム数 x 12 と一致しないことで
+    判別する。変換した録音データの派生特徴量は削除し、検索時に変換後の
+    HPCP特徴量から計算し直させる。変換できないデータが1件でもある場合は
+    何も変更せずに例外を送出し、旧形式のデータを残したまま起動しない。
+
+    Args:
+        connection: データベース接続
+
+    Returns:
+        変換した行数
+
+    Raises:
+        RuntimeError: 変換できないデータがある場合
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT id, recording_id, hpcp_data FROM hpcp_features "
+            "WHERE length(hpcp_data) != frame_count * 12"
+        )
+        legacy_rows = cursor.fetchall()
+        if not legacy_rows:
+            return 0
+
+        converted_rows = []
+        failures = []
+        for feature_id, recording_id, hpcp_data in legacy_rows:
+            try:
+                hpcp_q = _convert_legacy_hpcp(hpcp_data)
+            except ValueError as e:
+                failures.append(f"録音データ {recording_id}: {e}")
+                continue
+            converted_rows.append(
+                (
+                    np.ascontiguousarray(hpcp_q).tobytes(),
+                    hpcp_q.shape[0],
+                    feature_id,
+                    recording_id,
+                )
+            )
+
+        if failures:
+            raise RuntimeError(
+                "旧形式のHPCP特徴量を変換できません。該当する録音データを削除するか"
+                "登録し直してください: " + "; ".join(failures)
+            )
+
+        cursor.executemany(
+            "UPDATE hpcp_features SET hpcp_data = ?, frame_count = ? WHERE id = ?",
+            [row[:3] for row in converted_rows],
+        )
+        cursor.executemany(
+            "DELETE FROM similarity_features WHERE recording_id = ?",
+            [(row[3],) for row in converted_rows],
+        )
+        connection.commit()
+        return len(converted_rows)
+    finally:
+        cursor.close()
+
+
+def ensure_hpcp_features_unique_index(connection: sqlite3.Connection) -> int:
+    """hpcp_features.recording_id にユニークインデックスを作成する.
+
+    create_all は既存のテーブルにインデックスを追加しないため、ユニーク化する前に
+    作成されたデータベースでは、重複した行を最新の1件だけ残して削除してから
+    インデックスを作成する。同名の非ユニークなインデックスがある場合は作り直す。
+
+    Args:
+        connection: データベース接続
+
+    Returns:
+        削除した重複行の数
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "DELETE FROM hpcp_features WHERE id NOT IN "
+            "(SELECT MAX(id) FROM hpcp_features GROUP BY recording_id)"
+        )
+        removed_count = cursor.rowcount
+
+        cursor.execute("PRAGMA index_list('hpcp_features')")
+        for _, name, unique, *_ in cursor.fetchall():
+            if name == HPCP_FEATURES_RECORDING_ID_INDEX and not unique:
+                cursor.execute(f"DROP INDEX {HPCP_FEATURES_RECORDING_ID_INDEX}")
+
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {HPCP_FEATURES_RECORDING_ID_INDEX} "
+            "ON hpcp_features (recording_id)"
+        )
+        connection.commit()
+        return removed_count
+    finally:
+        cursor.close()
@@ -63,6 +63,12 @@ class Recording(Base):
     hpcp_features = relationship(
         "HPCPFeature", back_populates="recording", cascade="all, delete-orphan"
     )
+    similarity_feature = relationship(
+        "SimilarityFeature",
+        back_populates="recording",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
 
     def __repr__(self) -> str:
         return (
@@ -75,7 +81,7 @@ class HPCPFeature(Base):
     """HPCP特徴量モデル.
 
     RecordingテーブルのHPCP特徴量データを格納するテーブル。
-    numpy配列をバイナリデータとして保存。
+    uint8に量子化したnumpy配列を生のバイト列として保存。
     """
 
     __tablename__ = "hpcp_features"
@@ -85,10 +91,14 @@ class HPCPFeature(Base):
         Integer,
         ForeignKey("recordings.id"),
         nullable=False,
+        unique=True,
+        index=True,
         comment="録音データID（外部キー）",
     )
     hpcp_data = Column(
-        LargeBinary, nullable=False, comment="HPCP特徴量データ（numpy配列をバイナリ化）"
+        LargeBinary,
+        nullable=False,
+        comment="HPCP特徴量データ（uint8に量子化した配列のバイト列）",
     )
     frame_count = Column(Integer, nullable=False, comment="フレーム数")
     hop_size = Column(Integer, nullable=False, comment="ホップサイズ")
@@ -102,3 +112,43 @@ class HPCPFeature(Base):
             f"<HPCPFeature(id={self.id}, recording_id={self.recording_id}, "
             f"frame_count={self.frame_count})>"
         )
+
+
+class SimilarityFeature(Base):
+    """類似度計算用派生特徴量モデル.
+
+    HPCP特徴量から計算される平均HPCP、ヒストグラム、時系列特徴を
+    float32配列のバイナリとして格納するテーブル。登録時に一度だけ計算し、
+    検索時の再計算を不要にする。
+    """
+
+    __tablename__ = "similarity_features"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recording_id = Column(
+        Integer,
+        ForeignKey("recordings.id"),
+        nullable=False,
+        unique=True,
+        comment="録音データID（外部キー）",
+    )
+    mean_data = Column(
+        LargeBinary, nullable=False, comment="L2正規化済みの平均HPCP（float32）"
+    )
+    histogram_data = Column(
+        LargeBinary, nullable=False, comment="HPCPヒストグラム（float32）"
+    )
+    temporal_data = Column(
+        LargeBinary, nullable=False, comment="L2正規化済みの時系列特徴（float32）"
+    )
+    frame_count = Column(Integer, nullable=False, comment="フレーム数")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="作成日時")
+
+    # リレーション
+    recording = relationship("Recording", back_populates="similarity_feature")
+
+    def __repr__(self) -> str:
+        return (
+            f"<SimilarityFeature(id={self.id}, recording_id={self.recording_id}, "
+            f"frame_count={self.frame_count})>"
+        )
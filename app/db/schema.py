@@ -0,0 +1,109 @@
+"""sqlite-vecのベクトルテーブル定義モジュール."""
+
+import logging
+import sqlite3
+
+import numpy as np
+
+from app.core.audio.quantization import dequantize_hpcp, quantize_frame_vectors
+
+logger = logging.getLogger(__name__)
+
+# HPCP特徴量ベクトルテーブル（フレーム単位、int8に量子化して格納）
+HPCP_FRAMES_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS hpcp_frames USING vec0(
+        recording_id INTEGER,
+        frame_index INTEGER,
+        hpcp_vector INT8[12]
+    )
+"""
+
+# 楽曲レベル統計的特徴量ベクトルテーブル
+HPCP_SUMMARY_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS hpcp_summary USING vec0(
+        recording_id INTEGER,
+        mean_vector FLOAT[12],
+        std_vector FLOAT[12],
+        dominant_chord FLOAT[12]
+    )
+"""
+
+
+def _is_legacy_hpcp_frames(cursor: sqlite3.Cursor) -> bool:
+    """既存のhpcp_framesテーブルが旧形式（FLOAT[12]）かどうかを判定する.
+
+    Args:
+        cursor: データベースカーソル
+
+    Returns:
+        hpcp_vector列がINT8[12]でないhpcp_framesテーブルがある場合True
+    """
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'hpcp_frames'"
+    )
+    row = cursor.fetchone()
+    return row is not None and "INT8[12]" not in row[0].upper()
+
+
+def _rebuild_hpcp_frames(cursor: sqlite3.Cursor) -> int:
+    """旧形式のhpcp_framesテーブルを作り直し、hpcp_featuresから再登録する.
+
+    vec0の列の型は変更できないため、テーブルを削除して作り直す。
+    hpcp_featuresのデータ長がフレーム数と一致しない行は読み飛ばす。
+
+    Args:
+        cursor: データベースカーソル
+
+    Returns:
+        ベクトルを再登録した録音データの数
+    """
+    cursor.execute("DROP TABLE hpcp_frames")
+    cursor.execute(HPCP_FRAMES_DDL)
+
+    cursor.execute("SELECT recording_id, hpcp_data, frame_count FROM hpcp_features")
+    rebuilt_count = 0
+    for recording_id, hpcp_data, frame_count in cursor.fetchall():
+        if len(hpcp_data) != frame_count * 12:
+            logger.warning(
+                "録音データ %s のHPCP特徴量を読み出せないため、"
+                "ベクトルを再登録しません",
+                recording_id,
+            )
+            continue
+        hpcp_q = np.frombuffer(hpcp_data, dtype=np.uint8).reshape(frame_count, 12)
+        hpcp_i8 = quantize_frame_vectors(dequantize_hpcp(hpcp_q))
+        cursor.executemany(
+            "INSERT INTO hpcp_frames(recording_id, frame_index, hpcp_vector) "
+            "VALUES (?, ?, vec_int8(?))",
+            [
+                (recording_id, frame_index, hpcp_vector.tobytes())
+                for frame_index, hpcp_vector in enumerate(hpcp_i8)
+            ],
+        )
+        rebuilt_count += 1
+    return rebuilt_count
+
+
+def create_vector_tables(connection: sqlite3.Connection) -> int:
+    """ベクトル検索用テーブルを作成する.
+
+    hpcp_framesテーブルがフレームベクトルをfloat32で格納していた旧形式の
+    場合は、INT8[12]のテーブルに作り直してhpcp_featuresから再登録する。
+
+    Args:
+        connection: sqlite-vec拡張をロード済みのデータベース接続
+
+    Returns:
+        旧形式のテーブルから移行するため再登録した録音データの数
+    """
+    cursor = connection.cursor()
+    try:
+        rebuilt_count = 0
+        if _is_legacy_hpcp_frames(cursor):
+            rebuilt_count = _rebuild_hpcp_frames(cursor)
+        cursor.execute(HPCP_FRAMES_DDL)
+        cursor.execute(HPCP_SUMMARY_DDL)
+    finally:
+        cursor.close()
+    connection.commit()
+    return rebuilt_count
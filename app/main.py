@@ -1,25 +1,50 @@
 """FastAPI application entry point for UtaReco server."""
 
+import functools
 import os
 import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1 import api_v1_router
+from app.core.vector.sqlite_vec_manager import close_vec_manager
 from app.db.database import init_database
 
+# Debug mode is fixed at startup from the DEBUG environment variable
+DEBUG = bool(os.getenv("DEBUG"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """アプリケーションの起動時と終了時の処理.
+
+    複数ワーカーで起動する環境では、事前に一度だけ
+    ``python -c "from app.db.database import init_database; init_database()"``
+    を実行し、環境変数 UTARECO_SKIP_INIT を設定するとワーカーごとの初期化を省略できる。
+    """
+    # ORMのテーブルとsqlite-vecのベクトルテーブルをまとめて作成する
+    if not os.getenv("UTARECO_SKIP_INIT"):
+        init_database()
+    yield
+    # ベクトルDBの接続を閉じる
+    close_vec_manager()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="UtaReco API",
     description="Music recognition service using audio fingerprinting",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"] if os.getenv("DEBUG") else [],
+    allow_origins=["*"] if DEBUG else [],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -29,12 +54,6 @@ app.add_middleware(
 app.include_router(api_v1_router)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """アプリケーション起動時にデータベースを初期化."""
-    init_database()
-
-
 @app.get("/")
 async def root() -> dict[str, str]:
     """Root endpoint."""
@@ -74,41 +93,55 @@ async def info() -> dict[str, str]:
         "description": "Music recognition service using audio fingerprinting",
         "version": "0.1.0",
         "python_version": sys.version,
-        "environment": "development" if os.getenv("DEBUG") else "production",
+        "environment": "development" if DEBUG else "production",
     }
 
 
+# Sample audio settings for /test-essentia (1 second of 440Hz sine wave)
+TEST_SAMPLE_RATE = 44100
+TEST_FREQUENCY = 440.0
+TEST_DURATION = 1.0
+
+
+@functools.cache
+def _test_audio():
+    """Create the /test-essentia sample audio once and reuse it."""
+    import numpy as np
+
+    t = np.linspace(0, TEST_DURATION, int(TEST_SAMPLE_RATE * TEST_DURATION), False)
+    return np.sin(2 * np.pi * TEST_FREQUENCY * t).astype(np.float32)
+
+
+@functools.cache
+def _test_algorithms():
+    """Create the Essentia algorithms used by /test-essentia once and reuse them."""
+    import essentia.standard as es  # type: ignore
+
+    return es.Windowing(type="hann"), es.Spectrum(), es.SpectralCentroidTime()
+
+
 @app.get("/test-essentia")
 async def test_essentia() -> dict[str, str]:
     """Test Essentia algorithms with sample data."""
     try:
-        import essentia.standard as es  # type: ignore
-        import numpy as np
-
-        # Create sample audio data (1 second of 440Hz sine wave)
-        sample_rate = 44100
-        frequency = 440.0
-        duration = 1.0
-        t = np.linspace(0, duration, int(sample_rate * duration), False)
-        audio_data = np.sin(2 * np.pi * frequency * t).astype(np.float32)
+        # Sample audio data and algorithms are created on the first request only
+        audio_data = _test_audio()
+        windowing, spectrum, spectral_centroid = _test_algorithms()
 
         # Test windowing
-        windowing = es.Windowing(type="hann")
         windowed_frame = windowing(audio_data[:1024])
 
         # Test spectrum
-        spectrum = es.Spectrum()
         spectrum_result = spectrum(windowed_frame)
 
         # Test spectral centroid
-        spectral_centroid = es.SpectralCentroidTime()
         centroid = spectral_centroid(audio_data)
 
         return {
             "status": "success",
             "message": "Essentia algorithms working correctly",
-            "sample_rate": str(sample_rate),
-            "test_frequency": str(frequency),
+            "sample_rate": str(TEST_SAMPLE_RATE),
+            "test_frequency": str(TEST_FREQUENCY),
             "spectral_centroid": str(float(centroid)),
             "audio_length": str(len(audio_data)),
             "spectrum_length": str(len(spectrum_result)),
@@ -1,10 +1,142 @@
 """HPCP特徴量API用Pydanticスキーマ定義."""
 
 import base64
+import io
+import struct
+import zlib
 from datetime import datetime
 
 import numpy as np
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, model_validator
+
+# HPCP特徴量のバイナリ表現を識別する先頭バイト列と形式のバージョン
+HPCP_BINARY_MAGIC = b"HPCP"
+HPCP_BINARY_VERSION = 1
+# HPCP特徴量のバイナリ表現のヘッダー
+# （識別子, バージョン, フレーム数, 次元数をリトルエンディアンで格納）
+HPCP_BINARY_HEADER = struct.Struct("<4sBII")
+# HPCP特徴量の次元数
+HPCP_DIMENSION = 12
+# HPCP特徴量をdeflate圧縮する際の圧縮レベル（速度を優先して1）
+HPCP_BINARY_COMPRESSION_LEVEL = 1
+# 移行期間中に受け付ける旧形式のHPCP特徴量の、バージョンのないヘッダー
+# （フレーム数, 次元数）と npy 形式の先頭バイト列
+_LEGACY_HPCP_BINARY_HEADER = struct.Struct("<II")
+_NPY_MAGIC = b"\x93NUMPY"
+# 受け付けなくなったpickle形式（プロトコル2以降）の先頭バイト
+_PICKLE_PROTO = b"\x80"
+
+
+def encode_hpcp_array(hpcp_array: np.ndarray) -> str:
+    """HPCP特徴量をfloat32のバイト列にシリアライズしてBase64エンコードする.
+
+    バイト列は識別子（b"HPCP"）、形式のバージョン、形状を表す13バイトの
+    ヘッダーと、リトルエンディアンのfloat32で表した行優先の配列データを
+    deflate圧縮したものからなる。形式を変更する場合はバージョンを上げ、
+    decode_hpcp_arrayで以前のバージョンも読み込めるようにする。
+
+    Args:
+        hpcp_array: HPCP特徴量のnumpy配列（フレーム数 x 12）
+
+    Returns:
+        Base64エンコードされたHPCP特徴量
+    """
+    hpcp_f32 = np.ascontiguousarray(hpcp_array, dtype="<f4")
+    header = HPCP_BINARY_HEADER.pack(
+        HPCP_BINARY_MAGIC, HPCP_BINARY_VERSION, *hpcp_f32.shape
+    )
+    payload = zlib.compress(hpcp_f32.tobytes(), HPCP_BINARY_COMPRESSION_LEVEL)
+    return base64.b64encode(header + payload).decode("ascii")
+
+
+def _decode_npy_hpcp(hpcp_bytes: bytes) -> np.ndarray:
+    """旧形式（npy形式）のHPCP特徴量をnumpy配列に変換する.
+
+    Args:
+        hpcp_bytes: npy形式のHPCP特徴量
+
+    Returns:
+        HPCP特徴量のnumpy配列（フレーム数 x 12、C連続のfloat32、読み取り専用）
+
+    Raises:
+        ValueError: npy形式の数値配列として読み込めない、または形状が不正な場合
+    """
+    try:
+        hpcp_array = np.load(io.BytesIO(hpcp_bytes), allow_pickle=False)
+    except Exception as e:
+        raise ValueError(f"npy形式のHPCP特徴量を読み込めません: {e}") from e
+    if hpcp_array.ndim != 2 or hpcp_array.shape[1] != HPCP_DIMENSION:
+        raise ValueError(
+            f"HPCP配列は(フレーム数, 12)の形状である必要があります。"
+            f"実際の形状: {hpcp_array.shape}"
+        )
+
+    hpcp_f32 = np.ascontiguousarray(hpcp_array, dtype=np.float32)
+    hpcp_f32.setflags(write=False)
+    return hpcp_f32
+
+
+def decode_hpcp_array(hpcp_data: str) -> np.ndarray:
+    """Base64エンコードされたfloat32のHPCP特徴量をnumpy配列に変換する.
+
+    移行期間中は旧形式（バージョンのないヘッダーに続けて非圧縮またはdeflate
+    圧縮したfloat32を置く形式と、np.saveによるnpy形式）のデータも受け付ける。
+    任意のコード実行につながるpickle形式のデータは受け付けない。
+
+    Args:
+        hpcp_data: Base64エンコードされたHPCP特徴量
+
+    Returns:
+        HPCP特徴量のnumpy配列（フレーム数 x 12、C連続のfloat32、読み取り専用）
+
+    Raises:
+        ValueError: データの形状や長さが不正な場合
+    """
+    hpcp_bytes = base64.b64decode(hpcp_data)
+    if hpcp_bytes.startswith(HPCP_BINARY_MAGIC):
+        if len(hpcp_bytes) < HPCP_BINARY_HEADER.size:
+            raise ValueError("HPCP特徴量のデータが短すぎます")
+        _, version, frame_count, dimension = HPCP_BINARY_HEADER.unpack_from(hpcp_bytes)
+        if version != HPCP_BINARY_VERSION:
+            raise ValueError(f"未対応のHPCP特徴量の形式バージョンです: {version}")
+        body = hpcp_bytes[HPCP_BINARY_HEADER.size :]
+    elif hpcp_bytes.startswith(_NPY_MAGIC):
+        return _decode_npy_hpcp(hpcp_bytes)
+    else:
+        if len(hpcp_bytes) < _LEGACY_HPCP_BINARY_HEADER.size:
+            raise ValueError("HPCP特徴量のデータが短すぎます")
+        frame_count, dimension = _LEGACY_HPCP_BINARY_HEADER.unpack_from(hpcp_bytes)
+        if dimension != HPCP_DIMENSION and hpcp_bytes.startswith(_PICKLE_PROTO):
+            raise ValueError(
+                "pickle形式のHPCP特徴量は受け付けません。"
+                "extract-onlyで取得し直したhpcp_dataを送信してください"
+            )
+        body = hpcp_bytes[_LEGACY_HPCP_BINARY_HEADER.size :]
+
+    if dimension != HPCP_DIMENSION:
+        raise ValueError(
+            f"HPCP配列は(フレーム数, 12)の形状である必要があります。"
+            f"実際の形状: ({frame_count}, {dimension})"
+        )
+
+    # バージョンのないヘッダーの形式では、長さが一致すれば非圧縮として扱う
+    expected_size = frame_count * dimension * 4
+    if not hpcp_bytes.startswith(HPCP_BINARY_MAGIC) and len(body) == expected_size:
+        return np.frombuffer(body, dtype="<f4").reshape(frame_count, dimension)
+
+    # 不正なデータで過大なメモリを確保しないよう、展開後のサイズを制限する
+    decompressor = zlib.decompressobj()
+    try:
+        payload = decompressor.decompress(body, expected_size + 1)
+    except zlib.error as e:
+        raise ValueError(f"HPCP特徴量の展開に失敗しました: {e}") from e
+    if len(payload) != expected_size or not decompressor.eof:
+        raise ValueError(
+            f"HPCP特徴量のデータ長が形状 ({frame_count}, {dimension}) と一致しません"
+        )
+
+    # バイト列をコピーせずにC連続のfloat32配列として解釈する
+    return np.frombuffer(payload, dtype="<f4").reshape(frame_count, dimension)
 
 
 class SongInfo(BaseModel):
@@ -56,15 +188,14 @@ class HPCPExtractionRequest(BaseModel):
     # 共通
     recording_name: str = Field(..., description="音源名", min_length=1, max_length=100)
 
-    @validator("title")
-    def validate_title_or_song_id(cls, v, values):
+    @model_validator(mode="after")
+    def validate_title_or_song_id(self):
         """song_idまたはtitleのいずれかが必須."""
-        song_id = values.get("song_id")
-        if not song_id and not v:
+        if not self.song_id and not self.title:
             raise ValueError("song_idまたはtitleのいずれかが必須です")
-        if song_id and v:
+        if self.song_id and self.title:
             raise ValueError("song_idとtitleは同時に指定できません")
-        return v
+        return self
 
 
 # 新しい分離されたAPIのスキーマ
@@ -85,11 +216,8 @@ class HPCPExtractionOnlyResponse(BaseModel):
         processing_time: float,
     ) -> "HPCPExtractionOnlyResponse":
         """numpy配列からレスポンスを作成."""
-        import pickle
-
         # HPCP配列をBase64エンコード
-        hpcp_bytes = pickle.dumps(hpcp_array)
-        hpcp_data = base64.b64encode(hpcp_bytes).decode("utf-8")
+        hpcp_data = encode_hpcp_array(hpcp_array)
 
         # 音声情報
         audio_info = {
@@ -128,22 +256,18 @@ class HPCPSearchRequest(BaseModel):
     limit: int = Field(5, description="取得する類似楽曲数", ge=1, le=50)
 
     def to_hpcp_array(self) -> np.ndarray:
-        """Base64エンコードされたHPCP特徴量をnumpy配列に変換."""
-        import pickle
+        """Base64エンコードされたHPCP特徴量をnumpy配列に変換.
 
-        hpcp_bytes = base64.b64decode(self.hpcp_data.encode("utf-8"))
-        hpcp_array = pickle.loads(hpcp_bytes)
+        後段の類似度計算やベクトル検索でコピーや型変換が起きないよう、
+        常にC連続のfloat32配列を返す。
 
-        if not isinstance(hpcp_array, np.ndarray):
-            raise ValueError("HPCP特徴量の形式が不正です")
+        Returns:
+            HPCP特徴量のnumpy配列（フレーム数 x 12、C連続のfloat32、読み取り専用）
 
-        if hpcp_array.ndim != 2 or hpcp_array.shape[1] != 12:
-            raise ValueError(
-                f"HPCP配列は(フレーム数, 12)の形状である必要があります。"
-                f"実際の形状: {hpcp_array.shape}"
-            )
-
-        return hpcp_array
+        Raises:
+            ValueError: データの形状や長さが不正な場合
+        """
+        return decode_hpcp_array(self.hpcp_data)
 
 
 class RecordingCreateRequest(BaseModel):
@@ -167,27 +291,28 @@ class RecordingCreateRequest(BaseModel):
         None, description="アーティスト名（新規楽曲作成の場合）", max_length=200
     )
 
-    @validator("title")
-    def validate_title_or_song_id(cls, v, values):
+    @model_validator(mode="after")
+    def validate_title_or_song_id(self):
         """song_idまたはtitleのいずれかが必須."""
-        song_id = values.get("song_id")
-        if not song_id and not v:
+        if not self.song_id and not self.title:
             raise ValueError("song_idまたはtitleのいずれかが必須です")
-        if song_id and v:
+        if self.song_id and self.title:
             raise ValueError("song_idとtitleは同時に指定できません")
-        return v
+        return self
 
     def to_hpcp_array(self) -> np.ndarray:
-        """Base64エンコードされたHPCP特徴量をnumpy配列に変換."""
-        import pickle
+        """Base64エンコードされたHPCP特徴量をnumpy配列に変換.
 
-        hpcp_bytes = base64.b64decode(self.hpcp_data.encode("utf-8"))
-        hpcp_array = pickle.loads(hpcp_bytes)
+        後段の類似度計算やベクトル検索でコピーや型変換が起きないよう、
+        常にC連続のfloat32配列を返す。
 
-        if not isinstance(hpcp_array, np.ndarray):
-            raise ValueError("HPCP特徴量の形式が不正です")
+        Returns:
+            HPCP特徴量のnumpy配列（フレーム数 x 12、C連続のfloat32、読み取り専用）
 
-        return hpcp_array
+        Raises:
+            ValueError: データの形状や長さが不正な場合
+        """
+        return decode_hpcp_array(self.hpcp_data)
 
 
 class RecordingCreateResponse(BaseModel):
@@ -242,6 +367,11 @@ class SimilaritySearchResponse(BaseModel):
     )
     search_method: str = Field(..., description="検索方法")
     search_time: float = Field(..., description="検索時間（秒）")
+    query_hpcp_data: str | None = Field(
+        default=None,
+        description="クエリ音声から抽出したHPCP特徴量"
+        "（Base64エンコード、音声ファイルでinclude_hpcpを指定して検索した場合のみ）",
+    )
 
 
 class SongListResponse(BaseModel):
@@ -262,6 +392,14 @@ class RecordingListResponse(BaseModel):
     per_page: int = Field(..., description="1ページあたりの件数")
 
 
+class RecordingHPCPResponse(BaseModel):
+    """録音データのHPCP特徴量レスポンス."""
+
+    recording_id: int = Field(..., description="録音データID")
+    hpcp_data: str = Field(..., description="HPCP特徴量（Base64エンコード）")
+    shape: list[int] = Field(..., description="HPCP特徴量の形状")
+
+
 class VectorStats(BaseModel):
     """ベクトルデータベース統計情報."""
 
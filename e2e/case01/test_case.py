@@ -1,14 +1,16 @@
 """CASE01のe2eテスト実行スクリプト."""
 
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
-project_root = Path(__file__).parent.parent
+project_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(project_root))
 
-from app.core.audio.hpcp import extract_hpcp, normalize_hpcp  # noqa: E402
 from app.core.matching.similarity import is_same_recording_advanced  # noqa: E402
+from e2e.hpcp_cache import extract_normalized_hpcp  # noqa: E402
 
 
 def run_case01_test() -> bool:
@@ -35,24 +37,29 @@ def run_case01_test() -> bool:
         ("3", "1", False),  # 異なる
     ]
 
-    # 各ファイルのHPCP特徴を抽出
+    # 各ファイルのHPCP特徴を抽出（ファイルごとにプロセスを分けて並列実行）
     print("HPCP特徴を抽出中...")
     hpcp_features: dict[str, any] = {}
-    for file_id, file_path in test_files.items():
-        try:
-            print(f"  {file_path.name} を処理中...")
-            hpcp = extract_hpcp(file_path)
-            hpcp_normalized = normalize_hpcp(hpcp)
-            hpcp_features[file_id] = hpcp_normalized
-            print(f"    完了: HPCP shape = {hpcp_normalized.shape}")
-        except Exception as e:
-            print(f"    エラー: {e}")
-            return False
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            file_id: executor.submit(extract_normalized_hpcp, file_path)
+            for file_id, file_path in test_files.items()
+        }
+        for file_id, file_path in test_files.items():
+            try:
+                print(f"  {file_path.name} を処理中...")
+                hpcp_normalized = futures[file_id].result()
+                hpcp_features[file_id] = hpcp_normalized
+                print(f"    完了: HPCP shape = {hpcp_normalized.shape}")
+            except Exception as e:
+                print(f"    エラー: {e}")
+                executor.shutdown(cancel_futures=True)
+                return False
 
     # テストを実行
     print("\n同一性判定テストを実行中...")
     all_passed = True
-    results: list[tuple[str, str, bool, bool]] = []
+    results: list[tuple[str, str, bool, bool, bool]] = []
 
     for file1_id, file2_id, expected in expected_results:
         print(f"\n  File{file1_id} vs File{file2_id}:")
@@ -64,7 +71,7 @@ def run_case01_test() -> bool:
 
         # 結果を記録
         passed = is_same == expected
-        results.append((file1_id, file2_id, is_same, passed))
+        results.append((file1_id, file2_id, is_same, expected, passed))
 
         if not passed:
             all_passed = False
@@ -75,9 +82,7 @@ def run_case01_test() -> bool:
     print(f"{'File1':^10} {'File2':^10} {'判定':^10} {'期待値':^10} {'結果':^10}")
     print("-" * 60)
 
-    for (file1_id, file2_id, expected), (_, _, is_same, passed) in zip(
-        expected_results, results, strict=False
-    ):
+    for file1_id, file2_id, is_same, expected, passed in results:
         expected_str = "同一" if expected else "異なる"
         result_str = "同一" if is_same else "異なる"
         status = "✅ PASS" if passed else "❌ FAIL"
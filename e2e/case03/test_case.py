@@ -1,16 +1,18 @@
 """CASE03のe2eテスト実行スクリプト."""
 
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
-project_root = Path(__file__).parent.parent
+project_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(project_root))
 
-from app.core.audio.hpcp import extract_hpcp, normalize_hpcp  # noqa: E402
 from app.core.matching.similarity import (  # noqa: E402
     is_same_recording_advanced,
 )
+from e2e.hpcp_cache import extract_normalized_hpcp  # noqa: E402
 
 
 def run_case03_test() -> bool:
@@ -36,19 +38,24 @@ def run_case03_test() -> bool:
         ("dramaturgy", "sayonara_karaoke", False),  # 異なる楽曲
     ]
 
-    # 各ファイルのHPCP特徴を抽出
+    # 各ファイルのHPCP特徴を抽出（ファイルごとにプロセスを分けて並列実行）
     print("HPCP特徴を抽出中...")
     hpcp_features = {}
-    for file_id, file_path in test_files.items():
-        try:
-            print(f"  {file_path.name} を処理中...")
-            hpcp = extract_hpcp(file_path)
-            hpcp_normalized = normalize_hpcp(hpcp)
-            hpcp_features[file_id] = hpcp_normalized
-            print(f"    完了: HPCP shape = {hpcp_normalized.shape}")
-        except Exception as e:
-            print(f"    エラー: {e}")
-            return False
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            file_id: executor.submit(extract_normalized_hpcp, file_path)
+            for file_id, file_path in test_files.items()
+        }
+        for file_id, file_path in test_files.items():
+            try:
+                print(f"  {file_path.name} を処理中...")
+                hpcp_normalized = futures[file_id].result()
+                hpcp_features[file_id] = hpcp_normalized
+                print(f"    完了: HPCP shape = {hpcp_normalized.shape}")
+            except Exception as e:
+                print(f"    エラー: {e}")
+                executor.shutdown(cancel_futures=True)
+                return False
 
     # テストを実行
     print("\n同一性判定テストを実行中...")
@@ -0,0 +1,66 @@
+"""e2eテスト用のHPCP特徴抽出キャッシュ.
+
+各テストケースのスクリプトからプロジェクトルートをパスに追加した後に
+読み込んで使う。
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from app.core.audio.hpcp import extract_hpcp, normalize_hpcp
+
+# 抽出済みHPCP特徴のキャッシュディレクトリ
+HPCP_CACHE_DIR = Path.home() / ".cache" / "utareco"
+# HPCP抽出処理を変更した場合に古いキャッシュを使わないためのバージョン
+HPCP_CACHE_VERSION = 1
+
+
+def cached_extract_hpcp(file_path: Path) -> np.ndarray:
+    """音声ファイルからHPCP特徴を抽出する（結果をディスクにキャッシュする）.
+
+    ファイルのパス・更新時刻・サイズからキーを作り、一致するキャッシュが
+    あればEssentiaでの抽出を省略する。
+
+    Args:
+        file_path: 音声ファイルのパス
+
+    Returns:
+        HPCP特徴行列（フレーム数 x 12）
+    """
+    stat = file_path.stat()
+    key_source = (
+        f"{HPCP_CACHE_VERSION}:{file_path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+    )
+    key = hashlib.blake2b(key_source.encode("utf-8"), digest_size=16).hexdigest()
+    cache_path = HPCP_CACHE_DIR / f"{key}.npy"
+    if cache_path.exists():
+        return np.load(cache_path)
+
+    hpcp = extract_hpcp(file_path)
+
+    # 並列実行中の他プロセスが書きかけのファイルを読まないよう、
+    # 一時ファイルに書き出してから置き換える
+    HPCP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    with temp_path.open("wb") as f:
+        np.save(f, hpcp)
+    os.replace(temp_path, cache_path)
+    return hpcp
+
+
+def extract_normalized_hpcp(file_path: Path) -> np.ndarray:
+    """音声ファイルからHPCP特徴を抽出して正規化する.
+
+    ファイルごとに独立した処理のため、プロセスプールから並列に呼び出す。
+    抽出結果はキャッシュし、再実行時はEssentiaでの抽出を省略する。
+
+    Args:
+        file_path: 音声ファイルのパス
+
+    Returns:
+        正規化されたHPCP特徴行列（フレーム数 x 12）
+    """
+    return normalize_hpcp(cached_extract_hpcp(file_path))
@@ -1,10 +1,102 @@
 """Gradio UI for UtaReco API testing."""
 
-import json
+import hashlib
 import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 import gradio as gr
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+from urllib3.util.retry import Retry
+
+# Chunk size used when streaming audio files to the API
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Number of UI events processed concurrently (Gradio runs one at a time by default)
+UI_CONCURRENCY_LIMIT = 8
+# Maximum number of events waiting in the Gradio queue
+UI_QUEUE_MAX_SIZE = 64
+# Concurrency limit for events that upload audio and run HPCP extraction on the API
+AUDIO_CONCURRENCY_LIMIT = 4
+# Number of extracted HPCP features kept per audio content (LRU)
+HPCP_CACHE_SIZE = 32
+# Number of searches sent concurrently by a threshold sweep
+SWEEP_MAX_WORKERS = 4
+# Status shown when a request reused cached HPCP features instead of the audio
+CACHED_STATUS = "success (cached HPCP)"
+
+
+class _MultipartFileBody:
+    """A multipart/form-data body that streams the audio file in chunks.
+
+    The file is read from disk while the request is being sent, so the whole
+    body is never held in memory. The body length is known in advance, so the
+    request is sent with Content-Length instead of chunked transfer encoding.
+    """
+
+    def __init__(
+        self, audio_file: str, boundary: str, fields: dict[str, str] | None = None
+    ):
+        """Build the multipart framing around the audio file.
+
+        Args:
+            audio_file: Path to audio file
+            boundary: Multipart boundary string
+            fields: Additional form fields sent before the file
+        """
+        self.audio_file = audio_file
+
+        parts = []
+        for name, value in (fields or {}).items():
+            field = RequestField(name=name, data=value)
+            field.make_multipart()
+            parts.append(f"--{boundary}\r\n{field.render_headers()}{value}\r\n")
+
+        field = RequestField(
+            name="file", data=b"", filename=os.path.basename(audio_file)
+        )
+        field.make_multipart(content_type="audio/wav")
+        parts.append(f"--{boundary}\r\n{field.render_headers()}")
+
+        self.head = "".join(parts).encode()
+        self.tail = f"\r\n--{boundary}--\r\n".encode()
+        self.length = len(self.head) + os.path.getsize(audio_file) + len(self.tail)
+
+    def __len__(self) -> int:
+        """Return the total body size in bytes (used for Content-Length)."""
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield chunks of the request body."""
+        yield self.head
+        with open(self.audio_file, "rb") as f:
+            while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+        yield self.tail
+
+
+def _hash_audio_file(audio_file: str) -> str:
+    """Compute a content hash of an audio file used as the HPCP cache key.
+
+    Gradio stores every upload under a new temporary path, so the key is
+    derived from the file content rather than the path.
+
+    Args:
+        audio_file: Path to audio file
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(audio_file, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 class UtaRecoAPIClient:
@@ -18,63 +110,122 @@ class UtaRecoAPIClient:
         """
         self.base_url = base_url
 
-    def health_check(self) -> tuple[str, str]:
+        # Reuse pooled keep-alive connections instead of reconnecting per request
+        self.session = requests.Session()
+        # All endpoints used by this client respond with JSON
+        self.session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=UI_CONCURRENCY_LIMIT,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Base64 HPCP features keyed by audio content hash, so that searching
+        # the same audio again skips uploading and re-extracting it
+        self._hpcp_cache: OrderedDict[str, str] = OrderedDict()
+        self._hpcp_cache_lock = threading.Lock()
+
+    def _get_cached_hpcp(self, audio_hash: str) -> str | None:
+        """Return cached HPCP features for the audio content, if any."""
+        with self._hpcp_cache_lock:
+            hpcp_data = self._hpcp_cache.get(audio_hash)
+            if hpcp_data is not None:
+                self._hpcp_cache.move_to_end(audio_hash)
+            return hpcp_data
+
+    def _cache_hpcp(self, audio_hash: str, hpcp_data: str) -> None:
+        """Store HPCP features for the audio content, evicting the oldest entry."""
+        with self._hpcp_cache_lock:
+            self._hpcp_cache[audio_hash] = hpcp_data
+            self._hpcp_cache.move_to_end(audio_hash)
+            if len(self._hpcp_cache) > HPCP_CACHE_SIZE:
+                self._hpcp_cache.popitem(last=False)
+
+    def close(self) -> None:
+        """Close pooled connections held by the HTTP session."""
+        self.session.close()
+
+    def _post_audio_file(
+        self,
+        path: str,
+        audio_file: str,
+        fields: dict[str, str] | None = None,
+        params: dict | None = None,
+        timeout: float = 30,
+    ) -> requests.Response:
+        """Upload an audio file with form fields to an API endpoint.
+
+        Args:
+            path: Endpoint path under the base URL
+            audio_file: Path to audio file
+            fields: Additional form fields
+            params: Query parameters
+            timeout: Request timeout in seconds
+
+        Returns:
+            Response of the endpoint
+        """
+        boundary = choose_boundary()
+        return self.session.post(
+            f"{self.base_url}{path}",
+            data=_MultipartFileBody(audio_file, boundary, fields),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            params=params,
+            timeout=timeout,
+        )
+
+    def health_check(self) -> tuple[str, dict]:
         """Check API server health status.
 
         Returns:
             Tuple of (status, details)
         """
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            response = self.session.get(f"{self.base_url}/health", timeout=5)
             response.raise_for_status()
             data = response.json()
-            return data.get("status", "unknown"), json.dumps(
-                data, indent=2, ensure_ascii=False
-            )
+            return data.get("status", "unknown"), data
         except requests.RequestException as e:
-            return "error", f"API server connection failed: {str(e)}"
+            return "error", {"error": f"API server connection failed: {str(e)}"}
 
-    def test_essentia(self) -> tuple[str, str]:
+    def test_essentia(self) -> tuple[str, dict]:
         """Test Essentia functionality.
 
         Returns:
             Tuple of (status, details)
         """
         try:
-            response = requests.get(f"{self.base_url}/test-essentia", timeout=10)
+            response = self.session.get(f"{self.base_url}/test-essentia", timeout=10)
             response.raise_for_status()
             data = response.json()
-            return data.get("status", "unknown"), json.dumps(
-                data, indent=2, ensure_ascii=False
-            )
+            return data.get("status", "unknown"), data
         except requests.RequestException as e:
-            return "error", f"Essentia test failed: {str(e)}"
+            return "error", {"error": f"Essentia test failed: {str(e)}"}
 
-    def extract_hpcp(self, audio_file: str) -> tuple[str, str]:
+    def extract_hpcp(self, audio_file: str) -> tuple[str, dict]:
         """Extract HPCP features from audio file.
 
         Args:
             audio_file: Path to audio file
 
         Returns:
-            Tuple of (status, response_json)
+            Tuple of (status, response_data)
         """
         if not audio_file:
-            return "error", "No audio file provided"
+            return "error", {"error": "No audio file provided"}
 
         try:
-            with open(audio_file, "rb") as f:
-                files = {"file": (os.path.basename(audio_file), f, "audio/wav")}
-                response = requests.post(
-                    f"{self.base_url}/api/v1/hpcp/extract-only", files=files, timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-                return "success", json.dumps(data, indent=2, ensure_ascii=False)
+            response = self._post_audio_file("/api/v1/hpcp/extract-only", audio_file)
+            response.raise_for_status()
+            data = response.json()
+            self._cache_hpcp(_hash_audio_file(audio_file), data["hpcp_data"])
+            return "success", data
         except requests.RequestException as e:
-            return "error", f"HPCP extraction failed: {str(e)}"
+            return "error", {"error": f"HPCP extraction failed: {str(e)}"}
         except Exception as e:
-            return "error", f"Unexpected error: {str(e)}"
+            return "error", {"error": f"Unexpected error: {str(e)}"}
 
     def search_similar(
         self,
@@ -82,7 +233,7 @@ class UtaRecoAPIClient:
         search_method: str = "frames",
         threshold: float = 0.89,
         limit: int = 10,
-    ) -> tuple[str, str]:
+    ) -> tuple[str, dict]:
         """Search for similar recordings.
 
         Args:
@@ -92,56 +243,157 @@ class UtaRecoAPIClient:
             limit: Maximum number of results
 
         Returns:
-            Tuple of (status, response_json)
+            Tuple of (status, response_data)
         """
         if not audio_file:
-            return "error", "No audio file provided"
+            return "error", {"error": "No audio file provided"}
 
         try:
-            # First extract HPCP features
-            with open(audio_file, "rb") as f:
-                files = {"file": (os.path.basename(audio_file), f, "audio/wav")}
-                hpcp_response = requests.post(
-                    f"{self.base_url}/api/v1/hpcp/extract-only", files=files, timeout=30
-                )
-                hpcp_response.raise_for_status()
-                hpcp_data = hpcp_response.json()
+            audio_hash = _hash_audio_file(audio_file)
+            data, cached = self._search_audio(
+                audio_file, audio_hash, search_method, threshold, limit
+            )
+            return CACHED_STATUS if cached else "success", data
 
-            # Then search for similar recordings
-            search_request = {
-                "hpcp_data": hpcp_data["hpcp_data"],
-                "search_method": search_method,
-                "limit": limit,
-            }
+        except requests.RequestException as e:
+            return "error", {"error": f"Search failed: {str(e)}"}
+        except Exception as e:
+            return "error", {"error": f"Unexpected error: {str(e)}"}
 
-            search_response = requests.post(
-                f"{self.base_url}/api/v1/hpcp/search",
-                json=search_request,
-                params={"threshold": threshold},
-                timeout=30,
+    def search_similar_sweep(
+        self,
+        audio_file: str,
+        search_method: str = "frames",
+        thresholds: str = "0.85, 0.89, 0.93",
+        limit: int = 10,
+    ) -> tuple[str, dict]:
+        """Search for similar recordings with several similarity thresholds.
+
+        HPCP features are extracted from the audio file at most once, and the
+        searches for the remaining thresholds are sent concurrently with them.
+
+        Args:
+            audio_file: Path to audio file
+            search_method: Search method (frames, average, median)
+            thresholds: Comma-separated similarity thresholds
+            limit: Maximum number of results
+
+        Returns:
+            Tuple of (status, search results keyed by threshold)
+        """
+        if not audio_file:
+            return "error", {"error": "No audio file provided"}
+
+        try:
+            threshold_values = list(
+                dict.fromkeys(float(v) for v in thresholds.split(",") if v.strip())
             )
-            search_response.raise_for_status()
-            data = search_response.json()
-            return "success", json.dumps(data, indent=2, ensure_ascii=False)
+        except ValueError:
+            return "error", {"error": f"Invalid thresholds: {thresholds}"}
+
+        if not threshold_values:
+            return "error", {"error": "No thresholds provided"}
+
+        try:
+            audio_hash = _hash_audio_file(audio_file)
+            results = {}
+            if self._get_cached_hpcp(audio_hash) is None:
+                # The first search uploads the audio and caches its HPCP features
+                first = threshold_values[0]
+                results[first], _ = self._search_audio(
+                    audio_file, audio_hash, search_method, first, limit
+                )
+
+            remaining = [t for t in threshold_values if t not in results]
+            with ThreadPoolExecutor(max_workers=SWEEP_MAX_WORKERS) as executor:
+                for threshold, (data, _) in zip(
+                    remaining,
+                    executor.map(
+                        lambda t: self._search_audio(
+                            audio_file, audio_hash, search_method, t, limit
+                        ),
+                        remaining,
+                    ),
+                    strict=True,
+                ):
+                    results[threshold] = data
+
+            return "success", {str(t): results[t] for t in threshold_values}
 
         except requests.RequestException as e:
-            return "error", f"Search failed: {str(e)}"
+            return "error", {"error": f"Search failed: {str(e)}"}
         except Exception as e:
-            return "error", f"Unexpected error: {str(e)}"
+            return "error", {"error": f"Unexpected error: {str(e)}"}
 
-    def get_vector_stats(self) -> tuple[str, str]:
+    def _search_audio(
+        self,
+        audio_file: str,
+        audio_hash: str,
+        search_method: str,
+        threshold: float,
+        limit: int,
+    ) -> tuple[dict, bool]:
+        """Search for recordings similar to an audio file, reusing cached HPCP.
+
+        Args:
+            audio_file: Path to audio file
+            audio_hash: Content hash of the audio file
+            search_method: Search method (frames, average, median)
+            threshold: Similarity threshold
+            limit: Maximum number of results
+
+        Returns:
+            Tuple of (search response data, whether cached HPCP was used)
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        hpcp_data = self._get_cached_hpcp(audio_hash)
+        if hpcp_data is None:
+            # Extract HPCP features and search in a single request
+            search_response = self._post_audio_file(
+                "/api/v1/hpcp/search/audio",
+                audio_file,
+                fields={"search_method": search_method, "limit": str(int(limit))},
+                # Ask for the extracted features so later searches can reuse them
+                params={"threshold": threshold, "include_hpcp": "true"},
+                timeout=60,
+            )
+        else:
+            # Same audio was processed before: search with its HPCP features
+            search_response = self.session.post(
+                f"{self.base_url}/api/v1/hpcp/search",
+                json={
+                    "hpcp_data": hpcp_data,
+                    "search_method": search_method,
+                    "limit": int(limit),
+                },
+                params={"threshold": threshold},
+                timeout=30,
+            )
+        search_response.raise_for_status()
+        data = search_response.json()
+        # Keep the extracted features for later searches, not for display
+        query_hpcp_data = data.pop("query_hpcp_data", None)
+        if query_hpcp_data is not None:
+            self._cache_hpcp(audio_hash, query_hpcp_data)
+        return data, hpcp_data is not None
+
+    def get_vector_stats(self) -> tuple[str, dict]:
         """Get vector database statistics.
 
         Returns:
-            Tuple of (status, stats_json)
+            Tuple of (status, stats)
         """
         try:
-            response = requests.get(f"{self.base_url}/api/v1/hpcp/stats", timeout=10)
+            response = self.session.get(
+                f"{self.base_url}/api/v1/hpcp/stats", timeout=10
+            )
             response.raise_for_status()
             data = response.json()
-            return "success", json.dumps(data, indent=2, ensure_ascii=False)
+            return "success", data
         except requests.RequestException as e:
-            return "error", f"Stats retrieval failed: {str(e)}"
+            return "error", {"error": f"Stats retrieval failed: {str(e)}"}
 
     def save_recording_with_hpcp(
         self,
@@ -150,7 +402,7 @@ class UtaRecoAPIClient:
         artist: str,
         recording_name: str,
         song_id: int | None = None,
-    ) -> tuple[str, str]:
+    ) -> tuple[str, dict]:
         """Save recording with HPCP features to database.
 
         Args:
@@ -161,60 +413,66 @@ class UtaRecoAPIClient:
             song_id: Existing song ID (if adding to existing song)
 
         Returns:
-            Tuple of (status, response_json)
+            Tuple of (status, response_data)
         """
         if not audio_file:
-            return "error", "No audio file provided"
+            return "error", {"error": "No audio file provided"}
 
         if not song_id and not title:
-            return "error", "Either song_id or title must be provided"
+            return "error", {"error": "Either song_id or title must be provided"}
 
         if song_id and title:
-            return "error", "Cannot specify both song_id and title"
+            return "error", {"error": "Cannot specify both song_id and title"}
 
         if not recording_name:
-            return "error", "Recording name is required"
+            return "error", {"error": "Recording name is required"}
 
         try:
-            # First extract HPCP features
-            with open(audio_file, "rb") as f:
-                files = {"file": (os.path.basename(audio_file), f, "audio/wav")}
-                hpcp_response = requests.post(
-                    f"{self.base_url}/api/v1/hpcp/extract-only", files=files, timeout=30
-                )
-                hpcp_response.raise_for_status()
-                hpcp_data = hpcp_response.json()
-
-            # Prepare recording creation request
-            create_request = {
-                "hpcp_data": hpcp_data["hpcp_data"],
-                "audio_file_name": os.path.basename(audio_file),
-                "recording_name": recording_name.strip(),
-            }
+            # Prepare recording creation form fields
+            create_fields = {"recording_name": recording_name.strip()}
 
             if song_id:
-                create_request["song_id"] = song_id
+                create_fields["song_id"] = str(song_id)
             else:
-                create_request["title"] = title.strip()
+                create_fields["title"] = title.strip()
                 if artist:
-                    create_request["artist"] = artist.strip()
-
-            # Create recording with HPCP
-            create_response = requests.post(
-                f"{self.base_url}/api/v1/recordings/create",
-                json=create_request,
-                timeout=30,
-            )
+                    create_fields["artist"] = artist.strip()
+
+            hpcp_data = self._get_cached_hpcp(_hash_audio_file(audio_file))
+            if hpcp_data is None:
+                # Extract HPCP features and create recording in a single request
+                create_response = self._post_audio_file(
+                    "/api/v1/recordings/create/audio",
+                    audio_file,
+                    fields=create_fields,
+                    timeout=60,
+                )
+            else:
+                # Same audio was extracted or searched before: send its HPCP features
+                create_request = {
+                    **create_fields,
+                    "hpcp_data": hpcp_data,
+                    "audio_file_name": os.path.basename(audio_file),
+                }
+                if song_id:
+                    create_request["song_id"] = int(song_id)
+                create_response = self.session.post(
+                    f"{self.base_url}/api/v1/recordings/create",
+                    json=create_request,
+                    timeout=30,
+                )
             create_response.raise_for_status()
             data = create_response.json()
-            return "success", json.dumps(data, indent=2, ensure_ascii=False)
+            return CACHED_STATUS if hpcp_data is not None else "success", data
 
         except requests.RequestException as e:
-            return "error", f"Recording creation failed: {str(e)}"
+            return "error", {"error": f"Recording creation failed: {str(e)}"}
         except Exception as e:
-            return "error", f"Unexpected error: {str(e)}"
+            return "error", {"error": f"Unexpected error: {str(e)}"}
 
-    def get_recordings_list(self, skip: int = 0, limit: int = 100) -> tuple[str, str]:
+    def get_recordings_list(
+        self, skip: int = 0, limit: int = 100
+    ) -> tuple[str, dict | list]:
         """Get list of recordings.
 
         Args:
@@ -222,25 +480,26 @@ class UtaRecoAPIClient:
             limit: Maximum number of records to return
 
         Returns:
-            Tuple of (status, recordings_json)
+            Tuple of (status, recordings)
         """
         try:
             params = {"skip": skip, "limit": limit}
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/recordings/", params=params, timeout=10
             )
             response.raise_for_status()
             data = response.json()
-            return "success", json.dumps(data, indent=2, ensure_ascii=False)
+            return "success", data
         except requests.RequestException as e:
-            return "error", f"Recordings list retrieval failed: {str(e)}"
+            return "error", {"error": f"Recordings list retrieval failed: {str(e)}"}
 
 
-def create_gradio_interface():
-    """Create Gradio interface for UtaReco API testing."""
+def create_gradio_interface(api_client: UtaRecoAPIClient):
+    """Create Gradio interface for UtaReco API testing.
 
-    # Initialize API client
-    api_client = UtaRecoAPIClient()
+    Args:
+        api_client: API client used by the interface handlers
+    """
 
     with gr.Blocks(
         title="UtaReco API Test Interface",
@@ -261,20 +520,23 @@ def create_gradio_interface():
                 health_status = gr.Textbox(
                     label="Health Status", interactive=False, max_lines=1
                 )
-                health_details = gr.Code(label="Health Details", language="json")
+                health_details = gr.JSON(label="Health Details")
 
                 essentia_status = gr.Textbox(
                     label="Essentia Status", interactive=False, max_lines=1
                 )
-                essentia_details = gr.Code(label="Essentia Details", language="json")
+                essentia_details = gr.JSON(label="Essentia Details")
 
                 health_button.click(
-                    fn=api_client.health_check, outputs=[health_status, health_details]
+                    fn=api_client.health_check,
+                    outputs=[health_status, health_details],
+                    concurrency_limit=None,
                 )
 
                 essentia_button.click(
                     fn=api_client.test_essentia,
                     outputs=[essentia_status, essentia_details],
+                    concurrency_limit=None,
                 )
 
             # HPCP Extraction Tab
@@ -296,12 +558,13 @@ def create_gradio_interface():
                 hpcp_status = gr.Textbox(
                     label="Extraction Status", interactive=False, max_lines=1
                 )
-                hpcp_result = gr.Code(label="HPCP Extraction Result", language="json")
+                hpcp_result = gr.JSON(label="HPCP Extraction Result")
 
                 hpcp_extract_button.click(
                     fn=api_client.extract_hpcp,
                     inputs=[hpcp_audio],
                     outputs=[hpcp_status, hpcp_result],
+                    concurrency_limit=AUDIO_CONCURRENCY_LIMIT,
                 )
 
             # Similarity Search Tab
@@ -349,15 +612,31 @@ def create_gradio_interface():
 
                 search_button = gr.Button("Search Similar Songs", variant="primary")
 
+                with gr.Row():
+                    sweep_thresholds = gr.Textbox(
+                        value="0.85, 0.89, 0.93",
+                        label="閾値スイープ",
+                        info="カンマ区切りの各閾値でまとめて検索します",
+                    )
+                    sweep_button = gr.Button("Sweep Thresholds")
+
                 search_status = gr.Textbox(
                     label="Search Status", interactive=False, max_lines=1
                 )
-                search_result = gr.Code(label="Search Results", language="json")
+                search_result = gr.JSON(label="Search Results")
 
                 search_button.click(
                     fn=api_client.search_similar,
                     inputs=[search_audio, search_method, threshold, limit],
                     outputs=[search_status, search_result],
+                    concurrency_limit=AUDIO_CONCURRENCY_LIMIT,
+                )
+
+                sweep_button.click(
+                    fn=api_client.search_similar_sweep,
+                    inputs=[search_audio, search_method, sweep_thresholds, limit],
+                    outputs=[search_status, search_result],
+                    concurrency_limit=AUDIO_CONCURRENCY_LIMIT,
                 )
 
             # Save Recording Tab
@@ -408,7 +687,7 @@ def create_gradio_interface():
                 save_status = gr.Textbox(
                     label="Save Status", interactive=False, max_lines=1
                 )
-                save_result = gr.Code(label="Save Result", language="json")
+                save_result = gr.JSON(label="Save Result")
 
                 # モード切り替えのイベント
                 def toggle_save_mode(mode):
@@ -417,10 +696,13 @@ def create_gradio_interface():
                     else:
                         return gr.update(visible=False), gr.update(visible=True)
 
+                # Only toggles visibility, so skip the queue shared with API calls
                 save_mode.change(
                     fn=toggle_save_mode,
                     inputs=[save_mode],
                     outputs=[new_song_row, existing_song_row],
+                    queue=False,
+                    show_progress="hidden",
                 )
 
                 # 保存処理
@@ -451,6 +733,7 @@ def create_gradio_interface():
                         recording_name,
                     ],
                     outputs=[save_status, save_result],
+                    concurrency_limit=AUDIO_CONCURRENCY_LIMIT,
                 )
 
             # Recordings List Tab
@@ -480,12 +763,13 @@ def create_gradio_interface():
                 list_status = gr.Textbox(
                     label="List Status", interactive=False, max_lines=1
                 )
-                list_result = gr.Code(label="Recordings List", language="json")
+                list_result = gr.JSON(label="Recordings List")
 
                 list_button.click(
                     fn=api_client.get_recordings_list,
                     inputs=[list_skip, list_limit],
                     outputs=[list_status, list_result],
+                    concurrency_limit=None,
                 )
 
             # Database Stats Tab
@@ -498,10 +782,12 @@ def create_gradio_interface():
                 stats_status = gr.Textbox(
                     label="Stats Status", interactive=False, max_lines=1
                 )
-                stats_result = gr.Code(label="Database Statistics", language="json")
+                stats_result = gr.JSON(label="Database Statistics")
 
                 stats_button.click(
-                    fn=api_client.get_vector_stats, outputs=[stats_status, stats_result]
+                    fn=api_client.get_vector_stats,
+                    outputs=[stats_status, stats_result],
+                    concurrency_limit=None,
                 )
 
         # Footer
@@ -521,17 +807,26 @@ def create_gradio_interface():
 
 def main():
     """Main function to launch Gradio interface."""
-    demo = create_gradio_interface()
+    api_client = UtaRecoAPIClient()
+    demo = create_gradio_interface(api_client)
 
-    # Launch the interface
-    demo.launch(
-        server_name="127.0.0.1",
-        server_port=7860,
-        share=False,
-        show_api=False,
-        debug=True,
+    # Let concurrent users' API calls run in parallel on the worker threads
+    demo.queue(
+        default_concurrency_limit=UI_CONCURRENCY_LIMIT, max_size=UI_QUEUE_MAX_SIZE
     )
 
+    # Launch the interface
+    try:
+        demo.launch(
+            server_name="127.0.0.1",
+            server_port=7860,
+            share=False,
+            show_api=False,
+            debug=True,
+        )
+    finally:
+        api_client.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+"""テスト共通のフィクスチャ."""
+
+from collections.abc import Callable, Generator
+from typing import cast
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.v1 import hpcp as hpcp_api
+from app.core.audio.hpcp import normalize_hpcp
+from app.core.matching.cache import reference_feature_cache
+from app.core.vector import sqlite_vec_manager
+from app.db.crud import create_hpcp_feature, create_recording, create_song
+from app.db.database import Base, get_db
+from app.main import app
+
+
+@pytest.fixture
+def db_engine(tmp_path) -> Generator[Engine, None, None]:
+    """テストごとに一時ディレクトリのSQLiteデータベースを作成する."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'utareco.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_engine) -> Generator[Session, None, None]:
+    """一時データベースのセッションを取得する."""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def create_hpcp_recording(db_session) -> Callable[[np.ndarray], int]:
+    """HPCP特徴量付きの録音データを作成する関数を取得する."""
+
+    def create(hpcp_array: np.ndarray) -> int:
+        song = create_song(db_session, title="テスト楽曲")
+        recording = create_recording(
+            db_session,
+            song_id=cast(int, song.id),
+            recording_name="オリジナル",
+            duration=10.0,
+            sample_rate=44100,
+            audio_path="uploads/test.wav",
+        )
+        recording_id = cast(int, recording.id)
+        create_hpcp_feature(db_session, recording_id, hpcp_array, hop_size=2048)
+        return recording_id
+
+    return create
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, db_engine) -> Generator[TestClient, None, None]:
+    """一時データベースを使うAPIのテストクライアントを取得する.
+
+    アプリケーションの起動処理は行わず、db_engine で作成したテーブルを使う。
+    """
+    # 録音データの音声ファイルの保存先などを一時ディレクトリにする
+    monkeypatch.chdir(tmp_path)
+
+    testing_session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db() -> Generator[Session, None, None]:
+        db = testing_session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # ベクトル検索も同じ一時データベースを使う
+    vec_manager = sqlite_vec_manager.SQLiteVecManager(str(tmp_path / "utareco.db"))
+    vec_manager.initialize_vector_tables()
+    monkeypatch.setattr(sqlite_vec_manager, "_vec_manager", vec_manager)
+    reference_feature_cache.clear()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        vec_manager.close()
+        reference_feature_cache.clear()
+
+
+# テスト用のアップロードファイル（音声の読み込みは fake_hpcp_extraction で置き換える）
+AUDIO_FILE = ("test.wav", b"RIFF0000WAVE", "audio/wav")
+
+
+@pytest.fixture
+def fake_hpcp_extraction(monkeypatch) -> np.ndarray:
+    """音声の読み込みとHPCP特徴量の抽出を置き換え、抽出結果を取得する.
+
+    Essentiaを使わずに音声ファイルを受け付けるAPIをテストするため、
+    3秒の無音を読み込み、固定のHPCP特徴量を抽出したことにする。
+    """
+    hpcp_array = np.random.default_rng(0).random((40, 12), dtype=np.float32)
+    monkeypatch.setattr(
+        hpcp_api,
+        "load_audio",
+        lambda path, sample_rate=44100: np.zeros(sample_rate * 3, dtype=np.float32),
+    )
+    monkeypatch.setattr(
+        hpcp_api,
+        "extract_hpcp_from_audio",
+        lambda audio_data, sample_rate=44100: hpcp_array.copy(),
+    )
+    return normalize_hpcp(hpcp_array)
@@ -0,0 +1,101 @@
+"""参照音声の派生特徴量キャッシュのテスト."""
+
+import numpy as np
+
+from app.core.matching.cache import ReferenceFeatureCache
+from app.core.matching.similarity import HPCPFeatures
+
+
+class FakeClock:
+    """テスト用に手動で進める時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _features(frame_count: int) -> HPCPFeatures:
+    """テスト用の派生特徴量を作成する"""
+    return HPCPFeatures(
+        mean=np.zeros(12, dtype=np.float32),
+        histogram=np.zeros(32, dtype=np.float32),
+        temporal=np.zeros(12, dtype=np.float32),
+        frame_count=frame_count,
+    )
+
+
+def test_get_returns_stored_features():
+    """格納した派生特徴量を取得できることのテスト"""
+    cache = ReferenceFeatureCache(clock=FakeClock())
+    features = _features(10)
+    cache.put(1, features)
+
+    # 結果の検証
+    assert cache.get(1) is features
+    assert cache.get(2) is None
+
+
+def test_entries_expire_after_ttl():
+    """有効期間を過ぎたエントリは取得できず破棄されることのテスト"""
+    clock = FakeClock()
+    cache = ReferenceFeatureCache(ttl=60.0, clock=clock)
+    cache.put(1, _features(10))
+
+    # 有効期間ちょうどまでは取得できる
+    clock.now = 60.0
+    assert cache.get(1) is not None
+
+    # 有効期間を過ぎると取得できない
+    clock.now = 60.1
+    assert cache.get(1) is None
+
+    # 格納し直すと、その時点から有効期間を数える
+    cache.put(1, _features(10))
+    clock.now = 120.0
+    assert cache.get(1) is not None
+
+
+def test_least_recently_used_entry_is_evicted():
+    """上限を超えると最も古く使われたエントリから破棄されることのテスト"""
+    cache = ReferenceFeatureCache(capacity=2, clock=FakeClock())
+    cache.put(1, _features(1))
+    cache.put(2, _features(2))
+
+    # 1を参照して最近使用したエントリにしてから、3を追加する
+    assert cache.get(1) is not None
+    cache.put(3, _features(3))
+
+    # 結果の検証（最も古く使われた2が破棄される）
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+
+
+def test_invalidate_removes_entry():
+    """invalidateで指定したエントリのみが破棄されることのテスト"""
+    cache = ReferenceFeatureCache(clock=FakeClock())
+    cache.put(1, _features(1))
+    cache.put(2, _features(2))
+
+    cache.invalidate(1)
+    # 存在しないエントリを指定してもエラーにならない
+    cache.invalidate(999)
+
+    # 結果の検証
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+
+
+def test_clear_removes_all_entries():
+    """clearですべてのエントリが破棄されることのテスト"""
+    cache = ReferenceFeatureCache(clock=FakeClock())
+    cache.put(1, _features(1))
+    cache.put(2, _features(2))
+
+    cache.clear()
+
+    # 結果の検証
+    assert cache.get(1) is None
+    assert cache.get(2) is None
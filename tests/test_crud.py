@@ -0,0 +1,61 @@
+"""データベースCRUD操作のテスト."""
+
+import numpy as np
+import pytest
+
+from app.db.crud import _deserialize_hpcp, _serialize_hpcp, get_hpcp_arrays
+from app.db.models import HPCPFeature
+
+
+def test_serialize_hpcp_round_trip():
+    """HPCP特徴量のシリアライズとデシリアライズで量子化誤差内に復元されることのテスト"""
+    hpcp_array = np.random.default_rng(0).random((50, 12), dtype=np.float32)
+
+    hpcp_data = _serialize_hpcp(hpcp_array)
+    restored = _deserialize_hpcp(hpcp_data, frame_count=50)
+
+    # 結果の検証（1フレーム12バイトのuint8として格納される）
+    assert len(hpcp_data) == 50 * 12
+    assert restored.dtype == np.float32
+    assert restored.shape == (50, 12)
+    np.testing.assert_allclose(restored, hpcp_array, atol=1 / 510 + 1e-6)
+
+
+def test_serialize_hpcp_clips_out_of_range_values():
+    """0.0-1.0の範囲外の値は範囲内に丸めて格納されることのテスト"""
+    hpcp_array = np.array([[-0.5, 1.5] + [0.5] * 10], dtype=np.float32)
+
+    restored = _deserialize_hpcp(_serialize_hpcp(hpcp_array), frame_count=1)
+
+    # 結果の検証
+    assert restored[0, 0] == 0.0
+    assert restored[0, 1] == 1.0
+
+
+def test_deserialize_hpcp_rejects_length_mismatch():
+    """バイト列の長さがフレーム数と一致しない場合にValueErrorを送出することのテスト"""
+    hpcp_data = _serialize_hpcp(np.zeros((10, 12), dtype=np.float32))
+
+    # 末尾が欠けたデータと、旧形式（pickle）のデータ
+    for corrupt_data in (hpcp_data[:-1], b"\x80\x04\x95" + hpcp_data):
+        with pytest.raises(ValueError, match="データ長"):
+            _deserialize_hpcp(corrupt_data, frame_count=10)
+
+
+def test_get_hpcp_arrays_skips_corrupt_rows(db_session, create_hpcp_recording):
+    """デシリアライズできないHPCP特徴量は読み飛ばし、他の録音データは返すことのテスト"""
+    rng = np.random.default_rng(0)
+    valid_id = create_hpcp_recording(rng.random((30, 12), dtype=np.float32))
+    corrupt_id = create_hpcp_recording(rng.random((30, 12), dtype=np.float32))
+
+    # フレーム数と一致しない長さのバイト列に書き換える
+    db_session.query(HPCPFeature).filter(HPCPFeature.recording_id == corrupt_id).update(
+        {"hpcp_data": b"\x00" * 5}
+    )
+    db_session.commit()
+
+    hpcp_arrays = get_hpcp_arrays(db_session, [valid_id, corrupt_id])
+
+    # 結果の検証
+    assert list(hpcp_arrays) == [valid_id]
+    assert hpcp_arrays[valid_id].shape == (30, 12)
@@ -0,0 +1,167 @@
+"""HPCP特徴量APIのテスト."""
+
+import numpy as np
+
+from app.core.matching.cache import reference_feature_cache
+from app.db.models import HPCPFeature, SimilarityFeature
+from app.schemas.hpcp import decode_hpcp_array
+from tests.conftest import AUDIO_FILE
+
+
+def _decode_binary_response(response) -> np.ndarray:
+    """HPCP特徴量のバイナリレスポンスをヘッダーの形状・型でnumpy配列に変換する"""
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["content-encoding"] == "deflate"
+    shape = tuple(int(dim) for dim in response.headers["x-hpcp-shape"].split(","))
+    # TestClientはContent-Encodingに従って展開済みのバイト列を返す
+    return np.frombuffer(
+        response.content, dtype=response.headers["x-hpcp-dtype"]
+    ).reshape(shape)
+
+
+def test_extract_only_binary_matches_json(client, fake_hpcp_extraction):
+    """バイナリ版の抽出結果がJSON版のhpcp_dataと一致することのテスト"""
+    json_response = client.post("/api/v1/hpcp/extract-only", files={"file": AUDIO_FILE})
+    binary_response = client.post(
+        "/api/v1/hpcp/extract-only/binary", files={"file": AUDIO_FILE}
+    )
+
+    # 結果の検証
+    assert json_response.status_code == 200
+    hpcp_array = _decode_binary_response(binary_response)
+    assert binary_response.headers["x-hpcp-shape"] == "40,12"
+    assert binary_response.headers["x-hpcp-dtype"] == "<f4"
+    assert (
+        float(binary_response.headers["x-audio-duration"])
+        == (json_response.json()["audio_info"]["duration"])
+    )
+    np.testing.assert_array_equal(
+        hpcp_array, decode_hpcp_array(json_response.json()["hpcp_data"])
+    )
+    np.testing.assert_array_equal(hpcp_array, fake_hpcp_extraction)
+
+
+def test_get_recording_hpcp_binary_matches_json(client, create_hpcp_recording):
+    """バイナリ版の録音データのHPCP特徴量がJSON版と一致することのテスト"""
+    recording_id = create_hpcp_recording(
+        np.random.default_rng(0).random((30, 12), dtype=np.float32)
+    )
+
+    json_response = client.get(f"/api/v1/hpcp/recordings/{recording_id}/hpcp")
+    binary_response = client.get(f"/api/v1/hpcp/recordings/{recording_id}/hpcp/binary")
+
+    # 結果の検証
+    assert json_response.status_code == 200
+    hpcp_array = _decode_binary_response(binary_response)
+    assert binary_response.headers["x-hpcp-shape"] == "30,12"
+    assert json_response.json()["shape"] == [30, 12]
+    np.testing.assert_array_equal(
+        hpcp_array, decode_hpcp_array(json_response.json()["hpcp_data"])
+    )
+
+
+def test_get_recording_hpcp_reports_unreadable_data(
+    client, db_session, create_hpcp_recording
+):
+    """保存されているHPCP特徴量を読み出せない場合に内容の分かるエラーを返すことのテスト"""
+    recording_id = create_hpcp_recording(
+        np.random.default_rng(0).random((30, 12), dtype=np.float32)
+    )
+    db_session.query(HPCPFeature).filter(
+        HPCPFeature.recording_id == recording_id
+    ).update({"hpcp_data": b"\x00" * 5})
+    db_session.commit()
+
+    for path in (
+        f"/api/v1/hpcp/recordings/{recording_id}/hpcp",
+        f"/api/v1/hpcp/recordings/{recording_id}/hpcp/binary",
+    ):
+        response = client.get(path)
+
+        # 結果の検証
+        assert response.status_code == 500
+        assert "HPCP特徴量を読み出せません" in response.json()["detail"]
+
+
+def test_get_recording_hpcp_not_found(client):
+    """HPCP特徴量が存在しない場合に404を返すことのテスト"""
+    response = client.get("/api/v1/hpcp/recordings/999/hpcp/binary")
+
+    # 結果の検証
+    assert response.status_code == 404
+
+
+def test_search_by_audio(client, fake_hpcp_extraction):
+    """音声ファイルから抽出したHPCP特徴量で類似楽曲を検索することのテスト"""
+    created = client.post(
+        "/api/v1/recordings/create/audio",
+        files={"file": AUDIO_FILE},
+        data={"recording_name": "オリジナル", "title": "テスト楽曲"},
+    ).json()
+
+    response = client.post(
+        "/api/v1/hpcp/search/audio",
+        files={"file": AUDIO_FILE},
+        data={"search_method": "frames", "limit": "5"},
+    )
+
+    # 結果の検証（同じ音声で作成した録音データが見つかる）
+    assert response.status_code == 200
+    result = response.json()
+    assert result["search_method"] == "frames"
+    assert [r["recording"]["id"] for r in result["similar_recordings"]] == [
+        created["recording"]["id"]
+    ]
+    # 指定しない場合は抽出したHPCP特徴量を返さない
+    assert result["query_hpcp_data"] is None
+
+
+def test_search_computes_missing_reference_features(
+    client, db_session, fake_hpcp_extraction
+):
+    """派生特徴量が保存されていない録音データもHPCP特徴量から計算して検索することのテスト"""
+    created = client.post(
+        "/api/v1/recordings/create/audio",
+        files={"file": AUDIO_FILE},
+        data={"recording_name": "オリジナル", "title": "テスト楽曲"},
+    ).json()
+    # 派生特徴量を保存する前に登録された録音データを再現する
+    db_session.query(SimilarityFeature).delete()
+    db_session.commit()
+    reference_feature_cache.clear()
+
+    response = client.post("/api/v1/hpcp/search/audio", files={"file": AUDIO_FILE})
+
+    # 結果の検証（計算した派生特徴量はキャッシュされる）
+    assert response.status_code == 200
+    assert [r["recording"]["id"] for r in response.json()["similar_recordings"]] == [
+        created["recording"]["id"]
+    ]
+    assert reference_feature_cache.get(created["recording"]["id"]) is not None
+
+
+def test_search_by_audio_includes_hpcp_on_request(client, fake_hpcp_extraction):
+    """include_hpcpを指定した場合に抽出したHPCP特徴量を返すことのテスト"""
+    response = client.post(
+        "/api/v1/hpcp/search/audio",
+        files={"file": AUDIO_FILE},
+        params={"include_hpcp": "true"},
+    )
+
+    # 結果の検証
+    assert response.status_code == 200
+    np.testing.assert_array_equal(
+        decode_hpcp_array(response.json()["query_hpcp_data"]), fake_hpcp_extraction
+    )
+
+
+def test_search_by_audio_validates_form_fields(client, fake_hpcp_extraction):
+    """検索条件の指定が不正な場合に422を返すことのテスト"""
+    for data in ({"search_method": "unknown"}, {"limit": "0"}, {"limit": "51"}):
+        response = client.post(
+            "/api/v1/hpcp/search/audio", files={"file": AUDIO_FILE}, data=data
+        )
+
+        # 結果の検証
+        assert response.status_code == 422, data
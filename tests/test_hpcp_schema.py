@@ -0,0 +1,129 @@
+"""HPCP特徴量APIスキーマのテスト."""
+
+import base64
+import io
+import pickle
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from app.schemas.hpcp import (
+    HPCP_BINARY_HEADER,
+    HPCP_BINARY_MAGIC,
+    HPCP_BINARY_VERSION,
+    decode_hpcp_array,
+    encode_hpcp_array,
+)
+
+
+def _hpcp_array(frame_count: int = 20) -> np.ndarray:
+    """テスト用のHPCP特徴量を作成する."""
+    return np.random.default_rng(0).random((frame_count, 12), dtype=np.float32)
+
+
+def test_encode_decode_round_trip():
+    """エンコードしたHPCP特徴量をそのまま復元できることのテスト"""
+    hpcp_array = _hpcp_array()
+
+    restored = decode_hpcp_array(encode_hpcp_array(hpcp_array))
+
+    # 結果の検証
+    assert restored.dtype == np.float32
+    assert restored.flags.c_contiguous
+    np.testing.assert_array_equal(restored, hpcp_array)
+
+
+def test_encode_writes_versioned_header():
+    """エンコード結果の先頭に識別子・バージョン・形状のヘッダーが付くことのテスト"""
+    hpcp_bytes = base64.b64decode(encode_hpcp_array(_hpcp_array(7)))
+
+    # 結果の検証
+    assert HPCP_BINARY_HEADER.unpack_from(hpcp_bytes) == (
+        HPCP_BINARY_MAGIC,
+        HPCP_BINARY_VERSION,
+        7,
+        12,
+    )
+
+
+def test_decode_rejects_unknown_version():
+    """未対応のバージョンのデータを拒否することのテスト"""
+    hpcp_bytes = bytearray(base64.b64decode(encode_hpcp_array(_hpcp_array())))
+    hpcp_bytes[len(HPCP_BINARY_MAGIC)] = HPCP_BINARY_VERSION + 1
+
+    with pytest.raises(ValueError, match="バージョン"):
+        decode_hpcp_array(base64.b64encode(hpcp_bytes).decode("ascii"))
+
+
+def test_decode_accepts_legacy_unversioned_deflate_payload():
+    """移行期間中はバージョンのないヘッダーの形式（deflate圧縮）も受け付けることのテスト"""
+    hpcp_array = _hpcp_array()
+    hpcp_bytes = struct.pack("<II", *hpcp_array.shape) + zlib.compress(
+        hpcp_array.astype("<f4").tobytes()
+    )
+
+    restored = decode_hpcp_array(base64.b64encode(hpcp_bytes).decode("ascii"))
+
+    # 結果の検証
+    np.testing.assert_array_equal(restored, hpcp_array)
+
+
+def test_decode_accepts_legacy_uncompressed_payload():
+    """移行期間中はバージョンのないヘッダーの形式（非圧縮）も受け付けることのテスト"""
+    hpcp_array = _hpcp_array()
+    hpcp_bytes = (
+        struct.pack("<II", *hpcp_array.shape) + hpcp_array.astype("<f4").tobytes()
+    )
+
+    restored = decode_hpcp_array(base64.b64encode(hpcp_bytes).decode("ascii"))
+
+    # 結果の検証
+    assert restored.flags.c_contiguous
+    np.testing.assert_array_equal(restored, hpcp_array)
+
+
+def test_decode_rejects_truncated_payload():
+    """データ長が形状と一致しない場合に拒否することのテスト"""
+    hpcp_array = _hpcp_array()
+    hpcp_bytes = (
+        struct.pack("<II", *hpcp_array.shape) + hpcp_array.astype("<f4").tobytes()
+    )
+
+    for truncated in (
+        hpcp_bytes[:-4],
+        base64.b64decode(encode_hpcp_array(hpcp_array))[:-4],
+    ):
+        with pytest.raises(ValueError):
+            decode_hpcp_array(base64.b64encode(truncated).decode("ascii"))
+
+
+def test_decode_accepts_legacy_npy_payload():
+    """移行期間中は旧形式（npy形式）のデータも受け付けることのテスト"""
+    hpcp_array = _hpcp_array().astype(np.float64)
+    buffer = io.BytesIO()
+    np.save(buffer, hpcp_array, allow_pickle=False)
+
+    restored = decode_hpcp_array(base64.b64encode(buffer.getvalue()).decode("ascii"))
+
+    # 結果の検証
+    assert restored.dtype == np.float32
+    np.testing.assert_allclose(restored, hpcp_array, rtol=1e-6)
+
+
+def test_decode_rejects_pickle_payload():
+    """pickle形式のデータは読み込まずに拒否することのテスト"""
+    hpcp_data = base64.b64encode(pickle.dumps(_hpcp_array())).decode("ascii")
+
+    with pytest.raises(ValueError, match="pickle形式"):
+        decode_hpcp_array(hpcp_data)
+
+
+def test_decode_rejects_invalid_shape():
+    """12次元でないHPCP特徴量を拒否することのテスト"""
+    buffer = io.BytesIO()
+    np.save(buffer, np.zeros((5, 13), dtype=np.float32), allow_pickle=False)
+
+    with pytest.raises(ValueError, match="形状"):
+        decode_hpcp_array(base64.b64encode(buffer.getvalue()).decode("ascii"))
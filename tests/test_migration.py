@@ -0,0 +1,213 @@
+"""既存データベースのデータ移行のテスト."""
+
+import json
+import pickle
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.core.audio.quantization import quantize_frame_vectors
+from app.db import database
+from app.db.crud import get_hpcp_array
+from app.db.migration import (
+    ensure_hpcp_features_unique_index,
+    migrate_legacy_hpcp_features,
+)
+from app.db.models import HPCPFeature, SimilarityFeature
+from app.db.schema import create_vector_tables
+
+
+def _store_raw_hpcp_data(db_session, recording_id, hpcp_data):
+    """録音データのHPCP特徴量のバイト列を直接書き換える"""
+    db_session.query(HPCPFeature).filter(
+        HPCPFeature.recording_id == recording_id
+    ).update({"hpcp_data": hpcp_data})
+    db_session.commit()
+
+
+def _migrate(db_engine, migrate=migrate_legacy_hpcp_features):
+    """データベース接続を取得してデータの移行を実行する"""
+    connection = db_engine.raw_connection()
+    try:
+        return migrate(connection.driver_connection)
+    finally:
+        connection.close()
+
+
+def _execute(db_engine, *statements):
+    """データベース接続を取得してSQLを実行し、最後の結果を返す"""
+    connection = db_engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        rows = cursor.fetchall()
+        connection.commit()
+        return rows
+    finally:
+        connection.close()
+
+
+def test_migrate_converts_legacy_pickle_rows(
+    db_engine, db_session, create_hpcp_recording
+):
+    """pickle形式のHPCP特徴量が現在の形式に変換されることのテスト"""
+    rng = np.random.default_rng(0)
+    float_hpcp = rng.random((20, 12))
+    uint8_hpcp = rng.integers(0, 256, size=(20, 12), dtype=np.uint8)
+    current_hpcp = rng.random((20, 12), dtype=np.float32)
+
+    float_id = create_hpcp_recording(float_hpcp)
+    uint8_id = create_hpcp_recording(uint8_hpcp.astype(np.float32) / 255)
+    current_id = create_hpcp_recording(current_hpcp)
+    _store_raw_hpcp_data(db_session, float_id, pickle.dumps(float_hpcp))
+    _store_raw_hpcp_data(db_session, uint8_id, pickle.dumps(uint8_hpcp))
+
+    # 結果の検証（旧形式の2件のみ変換される）
+    assert _migrate(db_engine) == 2
+    db_session.expire_all()
+    restored_float = get_hpcp_array(db_session, float_id)
+    restored_uint8 = get_hpcp_array(db_session, uint8_id)
+    assert restored_float is not None
+    assert restored_uint8 is not None
+    np.testing.assert_allclose(restored_float, float_hpcp, atol=1 / 510 + 1e-6)
+    np.testing.assert_array_equal(restored_uint8, uint8_hpcp.astype(np.float32) / 255)
+
+    # 変換した録音データの派生特徴量は削除され、検索時に計算し直される
+    remaining_ids = {
+        feature.recording_id for feature in db_session.query(SimilarityFeature)
+    }
+    assert remaining_ids == {current_id}
+
+    # 2回目以降は変換対象がない
+    assert _migrate(db_engine) == 0
+
+
+def test_migrate_refuses_unconvertible_rows(
+    db_engine, db_session, create_hpcp_recording
+):
+    """変換できないデータがある場合は何も変更せずに例外を送出することのテスト"""
+    rng = np.random.default_rng(0)
+    legacy_id = create_hpcp_recording(rng.random((20, 12), dtype=np.float32))
+    corrupt_id = create_hpcp_recording(rng.random((20, 12), dtype=np.float32))
+    unsafe_id = create_hpcp_recording(rng.random((20, 12), dtype=np.float32))
+    legacy_data = pickle.dumps(rng.random((20, 12)))
+    _store_raw_hpcp_data(db_session, legacy_id, legacy_data)
+    _store_raw_hpcp_data(db_session, corrupt_id, b"corrupt")
+    # numpy配列以外のクラスを含むpickleは読み込まない
+    _store_raw_hpcp_data(db_session, unsafe_id, pickle.dumps(dict))
+
+    with pytest.raises(RuntimeError, match=f"録音データ {corrupt_id}") as exc_info:
+        _migrate(db_engine)
+
+    # 結果の検証（変換できる旧形式のデータも変更されない）
+    assert f"録音データ {unsafe_id}" in str(exc_info.value)
+    db_session.expire_all()
+    legacy_feature = db_session.query(HPCPFeature).filter(
+        HPCPFeature.recording_id == legacy_id
+    )
+    assert legacy_feature.one().hpcp_data == legacy_data
+
+
+def test_init_database_migrates_legacy_rows(
+    monkeypatch, db_engine, db_session, create_hpcp_recording
+):
+    """起動時のデータベース初期化で旧形式のHPCP特徴量が変換されることのテスト"""
+    hpcp_array = np.random.default_rng(0).random((20, 12))
+    recording_id = create_hpcp_recording(hpcp_array)
+    _store_raw_hpcp_data(db_session, recording_id, pickle.dumps(hpcp_array))
+    monkeypatch.setattr(database, "engine", db_engine)
+
+    database.init_database()
+
+    # 結果の検証
+    db_session.expire_all()
+    restored = get_hpcp_array(db_session, recording_id)
+    assert restored is not None
+    np.testing.assert_allclose(restored, hpcp_array, atol=1 / 510 + 1e-6)
+
+
+def test_unique_index_is_added_to_existing_database(
+    db_engine, db_session, create_hpcp_recording
+):
+    """ユニーク化する前のデータベースで重複を削除してインデックスを作成することのテスト"""
+    recording_id = create_hpcp_recording(np.zeros((20, 12), dtype=np.float32))
+    other_id = create_hpcp_recording(np.zeros((20, 12), dtype=np.float32))
+
+    # ユニーク化する前のスキーマ（非ユニークなインデックス）と重複した行を再現する
+    _execute(
+        db_engine,
+        "DROP INDEX ix_hpcp_features_recording_id",
+        "CREATE INDEX ix_hpcp_features_recording_id ON hpcp_features (recording_id)",
+        "INSERT INTO hpcp_features (recording_id, hpcp_data, frame_count, hop_size) "
+        f"SELECT recording_id, hpcp_data, 10, 1024 FROM hpcp_features "
+        f"WHERE recording_id = {recording_id}",
+    )
+
+    # 結果の検証（最新の1件だけが残る）
+    assert _migrate(db_engine, ensure_hpcp_features_unique_index) == 1
+    db_session.expire_all()
+    features = db_session.query(HPCPFeature).order_by(HPCPFeature.recording_id).all()
+    assert [(f.recording_id, f.hop_size) for f in features] == [
+        (recording_id, 1024),
+        (other_id, 2048),
+    ]
+
+    # インデックスはユニークになり、重複した行を挿入できない
+    indexes = _execute(db_engine, "PRAGMA index_list('hpcp_features')")
+    assert ("ix_hpcp_features_recording_id", 1) in [
+        (name, unique) for _, name, unique, *_ in indexes
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        _execute(
+            db_engine,
+            "INSERT INTO hpcp_features "
+            "(recording_id, hpcp_data, frame_count, hop_size) "
+            f"VALUES ({recording_id}, x'', 0, 2048)",
+        )
+
+    # 2回目以降は何も変更しない
+    assert _migrate(db_engine, ensure_hpcp_features_unique_index) == 0
+
+
+def test_legacy_hpcp_frames_table_is_rebuilt(
+    db_engine, db_session, create_hpcp_recording
+):
+    """FLOAT[12]のhpcp_framesテーブルをINT8[12]で作り直して再登録することのテスト"""
+    rng = np.random.default_rng(0)
+    hpcp_arrays = [rng.random((n, 12), dtype=np.float32) for n in (20, 30)]
+    recording_ids = [create_hpcp_recording(hpcp) for hpcp in hpcp_arrays]
+    corrupt_id = create_hpcp_recording(rng.random((20, 12), dtype=np.float32))
+    _store_raw_hpcp_data(db_session, corrupt_id, b"corrupt")
+
+    # フレームベクトルをfloat32で格納していた旧形式のテーブルを再現する
+    _execute(
+        db_engine,
+        "CREATE VIRTUAL TABLE hpcp_frames USING vec0("
+        "recording_id INTEGER, frame_index INTEGER, hpcp_vector FLOAT[12])",
+        "INSERT INTO hpcp_frames(recording_id, frame_index, hpcp_vector) "
+        f"VALUES ({recording_ids[0]}, 0, '[{', '.join(['0.5'] * 12)}]')",
+    )
+
+    # 結果の検証（読み出せない録音データは再登録しない）
+    assert _migrate(db_engine, create_vector_tables) == 2
+    (table_sql,) = _execute(
+        db_engine, "SELECT sql FROM sqlite_master WHERE name = 'hpcp_frames'"
+    )[0]
+    assert "INT8[12]" in table_sql
+    for recording_id, hpcp_array in zip(recording_ids, hpcp_arrays, strict=True):
+        rows = _execute(
+            db_engine,
+            "SELECT frame_index, vec_to_json(hpcp_vector) FROM hpcp_frames "
+            f"WHERE recording_id = {recording_id} ORDER BY frame_index",
+        )
+        vectors = np.array([json.loads(vector) for _, vector in rows])
+        assert [frame_index for frame_index, _ in rows] == list(range(len(hpcp_array)))
+        np.testing.assert_allclose(vectors, quantize_frame_vectors(hpcp_array), atol=1)
+    assert _execute(
+        db_engine, f"SELECT COUNT(*) FROM hpcp_frames WHERE recording_id = {corrupt_id}"
+    ) == [(0,)]
+
+    # 2回目以降は作り直さない
+    assert _migrate(db_engine, create_vector_tables) == 0
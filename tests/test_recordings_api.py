@@ -0,0 +1,46 @@
+"""録音データAPIのテスト."""
+
+import numpy as np
+
+from app.db.crud import get_hpcp_array
+from tests.conftest import AUDIO_FILE
+
+
+def test_create_recording_from_audio(client, db_session, fake_hpcp_extraction):
+    """音声ファイルから抽出したHPCP特徴量で録音データを作成することのテスト"""
+    response = client.post(
+        "/api/v1/recordings/create/audio",
+        files={"file": AUDIO_FILE},
+        data={"recording_name": "オリジナル", "title": "テスト楽曲"},
+    )
+
+    # 結果の検証
+    assert response.status_code == 200
+    result = response.json()
+    assert result["song"]["title"] == "テスト楽曲"
+    assert result["recording"]["recording_name"] == "オリジナル"
+    assert result["recording"]["duration"] == 3.0
+    assert result["vector_stored"] is True
+    stored = get_hpcp_array(db_session, result["recording"]["id"])
+    assert stored is not None
+    np.testing.assert_allclose(stored, fake_hpcp_extraction, atol=1 / 510 + 1e-6)
+
+
+def test_create_recording_from_audio_validates_song_fields(
+    client, fake_hpcp_extraction
+):
+    """楽曲情報の指定が不正な場合に422を返すことのテスト"""
+    for data in (
+        # song_idとtitleの同時指定
+        {"recording_name": "オリジナル", "song_id": "1", "title": "テスト楽曲"},
+        # song_idとtitleのどちらも指定しない
+        {"recording_name": "オリジナル"},
+        # 音源名の指定なし
+        {"title": "テスト楽曲"},
+    ):
+        response = client.post(
+            "/api/v1/recordings/create/audio", files={"file": AUDIO_FILE}, data=data
+        )
+
+        # 結果の検証
+        assert response.status_code == 422, data
@@ -1,11 +1,87 @@
 """コマンドラインインターフェース"""
 
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Tuple
 
 import click
+import numpy as np
+import soundfile as sf
 
-from .processor import process_audio_file
+from .processor import process_audio_array, process_audio_file
+
+
+def _generate_variation_values(
+    value_min: float,
+    value_max: float,
+    step: float,
+    neutral: float,
+    tolerance: float,
+) -> List[float]:
+    """範囲内の値をステップごとに生成する（変更なしとなる値は除く）
+
+    ステップの累積による浮動小数点誤差で最大値が範囲外と判定されないよう、
+    終端にステップの半分の余裕を持たせて生成し、丸めた後に範囲内の値だけを残す。
+
+    Args:
+        value_min: 最小値
+        value_max: 最大値
+        step: ステップ
+        neutral: 変更なしとなる値（ピッチは0、テンポは1.0）
+        tolerance: neutral と同じ値とみなす誤差
+
+    Returns:
+        生成した値のリスト
+    """
+    # 誤差で 1.2000000000000002 のような値にならないよう丸める
+    values = np.round(np.arange(value_min, value_max + step / 2, step), 10)
+    values = values[values <= value_max]
+    return values[np.abs(values - neutral) > tolerance].tolist()
+
+
+@lru_cache(maxsize=1)
+def _read_audio(input_file: Path) -> Tuple[np.ndarray, int]:
+    """音声ファイルを読み込む（直前に読み込んだファイルは再利用する）
+
+    変種は入力ファイルごとに続けて処理されるため、同じファイルを
+    変種の数だけデコードし直さないよう、直前の1ファイル分を保持する。
+
+    Args:
+        input_file: 入力音声ファイルのパス
+
+    Returns:
+        (音声データ, サンプリングレート)のタプル
+    """
+    audio_data, sample_rate = sf.read(str(input_file))
+    return audio_data, sample_rate
+
+
+def _process_variation(
+    task: Tuple[Path, Path, Optional[float], Optional[float]],
+) -> Optional[str]:
+    """1つの変種を生成する（プロセスプールから呼び出す）
+
+    Args:
+        task: (入力ファイル, 出力ファイル, ピッチシフト量, テンポ変更率)のタプル
+
+    Returns:
+        エラーが発生した場合はエラーメッセージ、成功した場合はNone
+    """
+    input_file, output_path, pitch, tempo = task
+    try:
+        audio_data, sample_rate = _read_audio(input_file)
+        audio_data = process_audio_array(
+            audio_data,
+            sample_rate,
+            pitch_shift_semitones=pitch,
+            tempo_rate=tempo,
+        )
+        sf.write(str(output_path), audio_data, sample_rate)
+    except Exception as e:
+        return str(e)
+    return None
 
 
 @click.command()
@@ -126,6 +202,13 @@ def cli():
     default=["wav", "mp3", "flac"],
     help="処理する音声ファイルの拡張子",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="並列に処理する数 デフォルト: CPUコア数",
+)
 @click.option(
     "-v",
     "--verbose",
@@ -140,6 +223,7 @@ def batch(
     step: float,
     tempo_step: float,
     extensions: Tuple[str, ...],
+    jobs: Optional[int],
     verbose: bool,
 ) -> None:
     """ディレクトリ内の音声ファイルをバッチ処理
@@ -156,6 +240,9 @@ def batch(
 
         # テンポを0.5から2.0倍、0.25刻みで変更
         audio-augment batch input_dir output_dir -t 0.5 2.0 --tempo-step 0.25
+
+        # 4並列で処理
+        audio-augment batch input_dir output_dir -j 4
     """
     # パラメータのバリデーション
     if step <= 0:
@@ -177,10 +264,13 @@ def batch(
         click.echo("エラー: テンポ範囲の最小値が最大値より大きいです", err=True)
         raise click.Abort()
 
-    # 入力ファイルを収集
-    input_files: List[Path] = []
-    for ext in extensions:
-        input_files.extend(input_dir.glob(f"**/*.{ext}"))
+    # 入力ファイルを収集（拡張子ごとに走査し直さず、ディレクトリを1回だけ走査する）
+    suffixes = {f".{ext.lower().lstrip('.')}" for ext in extensions}
+    input_files: List[Path] = sorted(
+        path
+        for path in input_dir.rglob("*")
+        if path.suffix.lower() in suffixes and path.is_file()
+    )
 
     if not input_files:
         click.echo(f"警告: {input_dir} に音声ファイルが見つかりません", err=True)
@@ -191,31 +281,15 @@ def batch(
     # 出力ディレクトリを作成
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # ピッチシフトの値を生成（浮動小数点エラーを避けるため整数ベースのループを使用）
-    pitch_values = []
-    if pitch_min <= pitch_max:
-        num_steps = int((pitch_max - pitch_min) / step) + 1
-        for i in range(num_steps):
-            pitch_value = pitch_min + (i * step)
-            if pitch_value > pitch_max:
-                break
-            if (
-                abs(pitch_value) > 1e-10
-            ):  # 0は変更なしなのでスキップ（浮動小数点精度を考慮）
-                pitch_values.append(pitch_value)
-
-    # テンポ変更率の値を生成（浮動小数点エラーを避けるため整数ベースのループを使用）
-    tempo_values = []
-    if tempo_min <= tempo_max:
-        num_steps = int((tempo_max - tempo_min) / tempo_step) + 1
-        for i in range(num_steps):
-            tempo_value = tempo_min + (i * tempo_step)
-            if tempo_value > tempo_max:
-                break
-            if (
-                abs(tempo_value - 1.0) > 1e-6
-            ):  # 1.0は変更なしなのでスキップ（より厳密な精度を使用）
-                tempo_values.append(tempo_value)
+    # ピッチシフトの値を生成（0は変更なしなのでスキップ）
+    pitch_values = _generate_variation_values(
+        pitch_min, pitch_max, step, neutral=0.0, tolerance=1e-10
+    )
+
+    # テンポ変更率の値を生成（1.0は変更なしなのでスキップ）
+    tempo_values = _generate_variation_values(
+        tempo_min, tempo_max, tempo_step, neutral=1.0, tolerance=1e-6
+    )
 
     total_variations = len(pitch_values) + len(tempo_values)
     click.echo(
@@ -223,55 +297,50 @@ def batch(
         f"(ピッチ: {len(pitch_values)}, テンポ: {len(tempo_values)})"
     )
 
+    # 生成する変種を（入力ファイル, 出力ファイル, ピッチ, テンポ）の組として列挙
+    tasks: List[Tuple[Path, Path, Optional[float], Optional[float]]] = []
+    for input_file in input_files:
+        # 相対パスを保持
+        relative_path = input_file.relative_to(input_dir)
+        base_name = relative_path.stem
+        suffix = relative_path.suffix
+        (output_dir / relative_path.parent).mkdir(parents=True, exist_ok=True)
+
+        # ピッチシフトのバリエーション
+        for pitch in pitch_values:
+            output_name = f"{base_name}_pitch{pitch:+.1f}{suffix}"
+            output_path = output_dir / relative_path.parent / output_name
+            tasks.append((input_file, output_path, pitch, None))
+
+        # テンポ変更のバリエーション
+        for tempo in tempo_values:
+            output_name = f"{base_name}_tempo{tempo:.2f}x{suffix}"
+            output_path = output_dir / relative_path.parent / output_name
+            tasks.append((input_file, output_path, None, tempo))
+
     processed = 0
     errors = 0
 
-    with click.progressbar(input_files, label="処理中") as files:
-        for input_file in files:
-            # 相対パスを保持
-            relative_path = input_file.relative_to(input_dir)
-            base_name = relative_path.stem
-            suffix = relative_path.suffix
-
-            # ピッチシフトのバリエーション
-            for pitch in pitch_values:
-                output_name = f"{base_name}_pitch{pitch:+.1f}{suffix}"
-                output_path = output_dir / relative_path.parent / output_name
-
-                try:
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-                    process_audio_file(
-                        input_file,
-                        output_path,
-                        pitch_shift_semitones=pitch,
-                    )
-                    processed += 1
-                    if verbose:
-                        click.echo(f"\n✅ {input_file.name} → {output_name}")
-                except Exception as e:
-                    errors += 1
-                    if verbose:
-                        click.echo(f"\n❌ {input_file.name}: {e}")
-
-            # テンポ変更のバリエーション
-            for tempo in tempo_values:
-                output_name = f"{base_name}_tempo{tempo:.2f}x{suffix}"
-                output_path = output_dir / relative_path.parent / output_name
-
-                try:
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-                    process_audio_file(
-                        input_file,
-                        output_path,
-                        tempo_rate=tempo,
-                    )
+    # 変種ごとに独立した処理のため、プロセスプールで並列に実行する
+    with ExitStack() as stack:
+        if jobs == 1:
+            results = map(_process_variation, tasks)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            results = executor.map(_process_variation, tasks)
+
+        with click.progressbar(
+            zip(tasks, results), length=len(tasks), label="処理中"
+        ) as bar:
+            for (input_file, output_path, _, _), error in bar:
+                if error is None:
                     processed += 1
                     if verbose:
-                        click.echo(f"\n✅ {input_file.name} → {output_name}")
-                except Exception as e:
+                        click.echo(f"\n✅ {input_file.name} → {output_path.name}")
+                else:
                     errors += 1
                     if verbose:
-                        click.echo(f"\n❌ {input_file.name}: {e}")
+                        click.echo(f"\n❌ {input_file.name}: {error}")
 
     click.echo(f"\n処理完了: 成功 {processed} / エラー {errors}")
 
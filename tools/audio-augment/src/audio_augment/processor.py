@@ -52,6 +52,38 @@ def tempo_change(
     return pyrb.time_stretch(audio_data, sample_rate, rate)
 
 
+def process_audio_array(
+    audio_data: np.ndarray,
+    sample_rate: int,
+    pitch_shift_semitones: Optional[float] = None,
+    tempo_rate: Optional[float] = None,
+) -> np.ndarray:
+    """読み込み済みの音声データのキー・テンポを変更
+
+    Args:
+        audio_data: 音声データ（numpy配列）
+        sample_rate: サンプリングレート
+        pitch_shift_semitones: ピッチシフト量（半音単位）
+        tempo_rate: テンポ変更率
+
+    Returns:
+        処理済みの音声データ
+
+    Example:
+        >>> audio, sr = sf.read("input.wav")
+        >>> shifted = process_audio_array(audio, sr, pitch_shift_semitones=3)
+    """
+    # ピッチシフト処理
+    if pitch_shift_semitones is not None and pitch_shift_semitones != 0:
+        audio_data = pitch_shift(audio_data, sample_rate, pitch_shift_semitones)
+
+    # テンポ変更処理
+    if tempo_rate is not None and tempo_rate != 1.0:
+        audio_data = tempo_change(audio_data, sample_rate, tempo_rate)
+
+    return audio_data
+
+
 def process_audio_file(
     input_path: Union[str, Path],
     output_path: Union[str, Path],
@@ -92,13 +124,13 @@ def process_audio_file(
     # 音声ファイルを読み込む
     audio_data, sample_rate = sf.read(str(input_path))
 
-    # ピッチシフト処理
-    if pitch_shift_semitones is not None and pitch_shift_semitones != 0:
-        audio_data = pitch_shift(audio_data, sample_rate, pitch_shift_semitones)
-
-    # テンポ変更処理
-    if tempo_rate is not None and tempo_rate != 1.0:
-        audio_data = tempo_change(audio_data, sample_rate, tempo_rate)
+    # ピッチシフト・テンポ変更処理
+    audio_data = process_audio_array(
+        audio_data,
+        sample_rate,
+        pitch_shift_semitones=pitch_shift_semitones,
+        tempo_rate=tempo_rate,
+    )
 
     # 出力ディレクトリが存在しない場合は作成
     output_path.parent.mkdir(parents=True, exist_ok=True)
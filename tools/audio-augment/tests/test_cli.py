@@ -0,0 +1,69 @@
+"""コマンドラインインターフェースのテスト"""
+
+from click.testing import CliRunner
+
+from audio_augment import cli as cli_module
+
+
+def _run_batch(tmp_path, monkeypatch, options, input_names=("song.wav",)):
+    """音声処理を行わずにバッチ処理を実行し、出力ファイル名のリストを返す"""
+    input_dir = tmp_path / "input"
+    for input_name in input_names:
+        input_file = input_dir / input_name
+        input_file.parent.mkdir(parents=True, exist_ok=True)
+        input_file.write_bytes(b"")
+    output_dir = tmp_path / "output"
+
+    processed = []
+    monkeypatch.setattr(
+        cli_module,
+        "_process_variation",
+        lambda task: processed.append(task[1].name),
+    )
+
+    # 差し替えた処理が反映されるよう、プロセスプールを使わずに実行する
+    result = CliRunner().invoke(
+        cli_module.cli, ["batch", str(input_dir), str(output_dir), "-j", "1", *options]
+    )
+    assert result.exit_code == 0
+    return sorted(processed)
+
+
+def test_batch_includes_range_end(tmp_path, monkeypatch):
+    """バッチ処理で範囲の最大値も変種として生成されることのテスト"""
+    processed = _run_batch(tmp_path, monkeypatch, ["-p", "-1", "1", "-t", "0.8", "1.2"])
+
+    # 結果の検証（0半音と1.0倍は変更なしなので含まれない）
+    assert processed == sorted(
+        [
+            "song_pitch-1.0.wav",
+            "song_pitch+1.0.wav",
+            "song_tempo0.80x.wav",
+            "song_tempo0.90x.wav",
+            "song_tempo1.10x.wav",
+            "song_tempo1.20x.wav",
+        ]
+    )
+
+
+def test_batch_excludes_values_beyond_range(tmp_path, monkeypatch):
+    """ステップが範囲を割り切れない場合に最大値を超える値を生成しないことのテスト"""
+    processed = _run_batch(
+        tmp_path, monkeypatch, ["-p", "0", "1", "-s", "0.6", "-t", "1", "1"]
+    )
+
+    # 結果の検証（1.2半音は範囲外なので含まれない）
+    assert processed == ["song_pitch+0.6.wav"]
+
+
+def test_batch_collects_files_by_extension(tmp_path, monkeypatch):
+    """サブディレクトリも含め、拡張子の大文字・小文字を区別せずに入力ファイルを収集することのテスト"""
+    processed = _run_batch(
+        tmp_path,
+        monkeypatch,
+        ["-p", "1", "1", "-t", "1", "1", "-e", "wav", "-e", "flac"],
+        input_names=("song.wav", "sub/other.FLAC", "sub/notes.txt", "track.mp3"),
+    )
+
+    # 結果の検証（指定していない拡張子のファイルは含まれない）
+    assert processed == ["other_pitch+1.0.FLAC", "song_pitch+1.0.wav"]